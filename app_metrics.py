@@ -0,0 +1,122 @@
+"""Stage timing and memory metrics for the Streamlit tools.
+
+Each script run creates a RunMetrics and wraps its slow steps:
+
+    metrics = RunMetrics("guide_respite_zipcode")
+
+    with metrics.stage("build_report", rows=len(df1)):
+        ...
+
+    render_debug_panel(metrics)
+
+Every finished stage is logged as one JSON line on the "pocketrn.metrics"
+logger (stderr by default) with the app, run id, seconds, the process' peak
+RSS and any extra fields, so a slow page can be traced to its stage.
+
+Set POCKETRN_TRACE_MEMORY=1 to also record each stage's tracemalloc peak
+above the memory allocated when it started.
+Tracing slows pandas-heavy code several times over, so it is off by
+default, and its peaks are process-wide (other sessions count too).
+The debug panel shows with ?debug=1 in the URL or POCKETRN_DEBUG=1.
+"""
+import json
+import logging
+import os
+import sys
+import time
+import tracemalloc
+import uuid
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+logger = logging.getLogger("pocketrn.metrics")
+
+if not logger.handlers:
+    _handler = logging.StreamHandler()
+    _handler.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(_handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+TRACE_MEMORY = os.environ.get("POCKETRN_TRACE_MEMORY") == "1"
+DEBUG = os.environ.get("POCKETRN_DEBUG") == "1"
+
+
+def _max_rss_mb():
+    if resource is None:
+        return None
+
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(rss / (1e6 if sys.platform == "darwin" else 1e3), 1)
+
+
+class RunMetrics:
+    def __init__(self, app, trace_memory=None):
+        self.app = app
+        self.run_id = uuid.uuid4().hex[:12]
+        self.trace_memory = TRACE_MEMORY if trace_memory is None else trace_memory
+        self.stages = []
+        self._peaks = []
+
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    @contextmanager
+    def stage(self, name, **fields):
+        """Time a block; yields the record so fields can be added inside."""
+        record = {"stage": name, **fields}
+
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+            baseline = tracemalloc.get_traced_memory()[0]
+            self._peaks.append(0)
+
+        start = time.perf_counter()
+        try:
+            yield record
+        except Exception as e:
+            record["error"] = type(e).__name__
+            raise
+        finally:
+            record["seconds"] = round(time.perf_counter() - start, 4)
+
+            if self.trace_memory:
+                # A nested stage resets the peak, so keep the largest seen;
+                # reported as growth over what was allocated at the start
+                peak = max(tracemalloc.get_traced_memory()[1], self._peaks.pop())
+                if self._peaks:
+                    self._peaks[-1] = max(self._peaks[-1], peak)
+                record["peak_mb"] = round((peak - baseline) / 1e6, 1)
+
+            record["max_rss_mb"] = _max_rss_mb()
+            self.stages.append(record)
+            self.log(record)
+
+    def log(self, record):
+        logger.info(json.dumps(
+            {"app": self.app, "run": self.run_id, **record},
+            default=str
+        ))
+
+
+def debug_enabled():
+    import streamlit as st
+
+    return DEBUG or st.query_params.get("debug") == "1"
+
+
+def render_debug_panel(metrics):
+    """Show this run's stages in an expander when debugging is enabled."""
+    import streamlit as st
+
+    if not debug_enabled() or not metrics.stages:
+        return
+
+    with st.expander("🔧 Debug: stage timings"):
+        st.caption(f"run {metrics.run_id}")
+        st.dataframe(metrics.stages)
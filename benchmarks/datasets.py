@@ -0,0 +1,93 @@
+"""Synthetic CMS-shaped datasets for the benchmarks.
+
+Sizes are given as multiples of the real inputs: the ZIP Code to Carrier
+Locality file has ~43k rows, splitter uploads are taken as 30k rows of
+multi-ZIP cells, and Addendum D is a fixed table of ~110 localities.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.zipcode_extraction import make_zip_column
+from guide_respite_engine import ADDENDUM_D_HEADER_ROW, MAC_COLUMN
+
+ZIP_CARRIER_ROWS = 43_000
+ZIP_UPLOAD_ROWS = 30_000
+
+STATES = [
+    "AK", "AL", "AR", "AZ", "CA", "CO", "CT", "DC", "DE", "FL", "GA", "GU",
+    "HI", "IA", "ID", "IL", "IN", "KS", "KY", "LA", "MA", "MD", "ME", "MI",
+    "MN", "MO", "NY", "PR", "TX", "VI", "WA",
+]
+MACS = [1112, 2102, 3102, 4112, 5102, 6102, 7102, 8102, 13102, 15102]
+
+
+def make_addendum_d(seed=0):
+    rng = np.random.default_rng(seed)
+    rows = []
+
+    for state in STATES:
+        mac = int(rng.choice(MACS))
+        for locality in range(int(rng.integers(1, 8))):
+            gaf = round(float(rng.uniform(0.85, 1.3)), 3)
+            rows.append({
+                MAC_COLUMN: mac,
+                "State": state,
+                "Locality Number": locality,
+                "Locality Name": f"{state} LOCALITY {locality}" + ("*" if locality == 0 else ""),
+                "2025 PW GPCI": round(float(rng.uniform(1, 1.1)), 3),
+                "2025 GAF": gaf,
+                "2026 GAF": round(gaf * 1.01, 3),
+            })
+
+    return pd.DataFrame(rows)
+
+
+def make_zip_carrier(rows, addendum_d, seed=0):
+    """ZIP Code to Carrier Locality rows pointing at addendum_d localities.
+
+    ~1% of rows carry a state Addendum D does not list (recovered by the
+    MAC + Locality fallback) and ~2% an unknown locality (unmatched).
+    """
+    rng = np.random.default_rng(seed)
+    picked = addendum_d.iloc[rng.integers(0, len(addendum_d), rows)]
+
+    state = picked["State"].to_numpy(dtype=object)
+    locality = picked["Locality Number"].to_numpy()
+    roll = rng.random(rows)
+    state[roll < 0.01] = "ZZ"
+    locality = np.where((roll >= 0.01) & (roll < 0.03), 99, locality)
+
+    return pd.DataFrame({
+        "STATE": state,
+        "ZIP CODE": rng.integers(501, 99950, rows),
+        "CARRIER": picked[MAC_COLUMN].to_numpy(),
+        "LOCALITY": locality,
+        "RURAL IND": rng.choice(["", "R", "B"], rows),
+        "LAB CB LOCALITY": rng.choice(["", "01", "02"], rows),
+        "RURAL IND2": rng.choice(["", "9"], rows),
+        "PLUS FOUR FLAG": rng.integers(0, 2, rows),
+        "PART B DRUG INDICATOR": rng.choice(["", "Y"], rows),
+        "YEAR/QTR": 20261,
+    })
+
+
+def make_zip_upload_csv(rows, seed=0):
+    """Splitter upload CSV bytes with a Zip_Codes column of multi-ZIP cells."""
+    return make_zip_column(rows, seed).to_csv(index=False).encode("utf-8")
+
+
+def write_workbooks(directory, zip_carrier, addendum_d):
+    """Write both sources as xlsx, Addendum D with title rows above its header."""
+    zip_path = os.path.join(directory, "ZIP5_BENCH.xlsx")
+    addendum_path = os.path.join(directory, "Addendum D BENCH.xlsx")
+
+    zip_carrier.to_excel(zip_path, index=False)
+    with pd.ExcelWriter(addendum_path) as writer:
+        pd.DataFrame([["ADDENDUM D. GEOGRAPHIC ADJUSTMENT FACTORS"], ["CY 2026"], [""]]).to_excel(
+            writer, index=False, header=False
+        )
+        addendum_d.to_excel(writer, index=False, startrow=ADDENDUM_D_HEADER_ROW)
+
+    return zip_path, addendum_path
@@ -0,0 +1,121 @@
+"""Load-test respite_rate_service with concurrent keep-alive GET /rate clients.
+
+Starts the service in a subprocess, waits for /health, then runs
+--connections clients for --seconds, each sending one request at a time.
+ZIPs are drawn from --distinct values, so a small pool measures cached
+responses and a large one cache misses. The client shares the machine's
+CPUs with the server, so on one core the numbers are a lower bound.
+Run from the repository root:
+
+    python -m benchmarks.rate_service --connections 32 --seconds 10
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+
+async def _get(reader, writer, path):
+    writer.write(f"GET {path} HTTP/1.1\r\nHost: bench\r\n\r\n".encode("latin-1"))
+    head = await reader.readuntil(b"\r\n\r\n")
+    length = int(head.lower().split(b"content-length:")[1].split(b"\r\n")[0])
+    body = await reader.readexactly(length)
+    return int(head.split(b" ", 2)[1]), body
+
+
+async def _client(port, paths, deadline, latencies):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    errors = 0
+    i = 0
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        status, _ = await _get(reader, writer, paths[i % len(paths)])
+        latencies.append(time.perf_counter() - start)
+        errors += status != 200
+        i += 1
+    writer.close()
+    return errors
+
+
+async def _wait_ready(port, timeout=60):
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        try:
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            status, _ = await _get(reader, writer, "/health")
+            writer.close()
+            if status == 200:
+                return
+        except (OSError, asyncio.IncompleteReadError):
+            pass
+        await asyncio.sleep(0.1)
+    raise RuntimeError("service did not become ready")
+
+
+async def run(port, connections, seconds, distinct, seed=0):
+    await _wait_ready(port)
+
+    rng = np.random.default_rng(seed)
+    pool = [f"{z:05d}" for z in rng.integers(0, 100_000, distinct)]
+    paths = [f"/rate?zip={z}&date=2026-07-01" for z in pool]
+
+    latencies = []
+    deadline = time.perf_counter() + seconds
+    start = time.perf_counter()
+    errors = await asyncio.gather(*[
+        _client(port, paths[n::connections] or paths, deadline, latencies)
+        for n in range(connections)
+    ])
+    elapsed = time.perf_counter() - start
+
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    _, body = await _get(reader, writer, "/metrics")
+    writer.close()
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": sum(errors),
+        "requests_per_second": len(latencies) / elapsed,
+        "p50_ms": latencies[len(latencies) // 2] * 1000,
+        "p99_ms": latencies[int(len(latencies) * 0.99)] * 1000,
+        "server": json.loads(body),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--connections", type=int, default=32)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--distinct", type=int, default=1_000, help="distinct ZIPs requested")
+    args = parser.parse_args()
+
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    server = subprocess.Popen(
+        [sys.executable, "respite_rate_service.py", "--port", str(args.port)],
+        cwd=root,
+        stdout=subprocess.DEVNULL,
+    )
+    try:
+        result = asyncio.run(run(args.port, args.connections, args.seconds, args.distinct))
+    finally:
+        server.terminate()
+        server.wait()
+
+    rate_route = result["server"]["routes"]["/rate"]
+    print(f"connections:     {args.connections}, {args.distinct:,} distinct ZIPs")
+    print(f"requests:        {result['requests']:,} ({result['errors']:,} errors)")
+    print(f"throughput:      {result['requests_per_second']:,.0f} req/s")
+    print(f"client latency:  p50 {result['p50_ms']:.2f} ms, p99 {result['p99_ms']:.2f} ms")
+    print(f"server latency:  p50 {rate_route['p50_ms']:.3f} ms, p99 {rate_route['p99_ms']:.3f} ms")
+    print(f"cache hit rate:  {result['server']['cache']['hit_rate']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,281 @@
+"""Time the main data paths at 1x/10x/100x CMS scale and save the results.
+
+Benchmarks (scale multiplies the rows, see benchmarks/datasets.py):
+
+    splitter_extraction  stream_unique_zipcodes + ZipChunkWriter on an upload CSV
+    gaf_merge            prepare_sources + join_gaf
+    rate_formatting      compute_report (rates, geography cleanup, formatting)
+    csv_export           report_csv_bytes
+    xlsx_export          report_xlsx_bytes (skipped past Excel's row limit)
+    zip_lookup_bulk      RateStore.lookup_many, 43k ZIPs per 1x
+    zip_lookup_single    RateStore.rate_on, 1k calls per 1x
+
+Results are written to benchmarks/results/<time>-<commit>.json; pass
+--compare with an earlier file to see the change. Run from the repository
+root:
+
+    python -m benchmarks.suite --scales 1 10 100
+    python -m benchmarks.suite --compare benchmarks/results/<file>.json
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import subprocess
+import tempfile
+import time
+from datetime import date, datetime, timezone
+from functools import cached_property
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.datasets import (
+    ZIP_CARRIER_ROWS,
+    ZIP_UPLOAD_ROWS,
+    make_addendum_d,
+    make_zip_carrier,
+    make_zip_upload_csv,
+)
+from guide_respite_engine import (
+    compute_report,
+    join_gaf,
+    prepare_sources,
+    report_csv_bytes,
+    report_xlsx_bytes,
+)
+from respite_rate_index import RateIndex
+from respite_rate_store import RATE_PERIODS, RateStore
+from zipcode_extraction import ZipChunkWriter, stream_unique_zipcodes
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+GAF_COLUMN = "2026 GAF"
+BASE_RATE = 32.17
+START_DATE = date(2026, 7, 1)
+RUN_ID = 20260701000000
+
+LOOKUP_ROWS = ZIP_CARRIER_ROWS
+SINGLE_LOOKUPS = 1_000
+
+# Excel sheets hold 1,048,576 rows including the header
+EXCEL_MAX_ROWS = 1_048_575
+
+
+class Dataset:
+    """Inputs for one scale, built lazily and outside the timed calls."""
+
+    def __init__(self, scale, seed=0):
+        self.scale = scale
+        self.seed = seed
+
+    @cached_property
+    def addendum_d(self):
+        return make_addendum_d(self.seed)
+
+    @cached_property
+    def zip_carrier(self):
+        return make_zip_carrier(ZIP_CARRIER_ROWS * self.scale, self.addendum_d, self.seed)
+
+    @cached_property
+    def upload_csv(self):
+        return make_zip_upload_csv(ZIP_UPLOAD_ROWS * self.scale, self.seed)
+
+    @cached_property
+    def sources(self):
+        return prepare_sources(self.zip_carrier, self.addendum_d, [GAF_COLUMN])
+
+    @cached_property
+    def merged_df(self):
+        return join_gaf(*self.sources, GAF_COLUMN)
+
+    @cached_property
+    def final_df(self):
+        return compute_report(self.merged_df, GAF_COLUMN, BASE_RATE, START_DATE, RUN_ID)
+
+    @cached_property
+    def rate_store(self):
+        # Four periods of the 1x report at different base rates, the shape
+        # of the lookup app's store
+        merged_df = self.merged_df if self.scale == 1 else Dataset(1, self.seed).merged_df
+        return RateStore.from_indexes([
+            (
+                period,
+                RateIndex.from_frame(
+                    compute_report(merged_df, GAF_COLUMN, BASE_RATE + number, period.start, RUN_ID)
+                ),
+            )
+            for number, period in enumerate(RATE_PERIODS)
+        ])
+
+    @cached_property
+    def lookup_zips(self):
+        rng = np.random.default_rng(self.seed)
+        return [f"{z:05d}" for z in rng.integers(0, 100_000, LOOKUP_ROWS * self.scale)]
+
+
+# ---------------------------
+# Benchmarks
+# ---------------------------
+# Each takes a Dataset and returns (rows, call); only call() is timed.
+def splitter_extraction(data):
+    upload_csv = data.upload_csv
+
+    def call():
+        with tempfile.TemporaryDirectory() as output_dir:
+            with ZipChunkWriter(output_dir, 9999) as writer:
+                stream_unique_zipcodes(io.BytesIO(upload_csv), writer)
+
+    return ZIP_UPLOAD_ROWS * data.scale, call
+
+
+def gaf_merge(data):
+    zip_carrier, addendum_d = data.zip_carrier, data.addendum_d
+
+    def call():
+        join_gaf(*prepare_sources(zip_carrier, addendum_d, [GAF_COLUMN]), GAF_COLUMN)
+
+    return len(zip_carrier), call
+
+
+def rate_formatting(data):
+    merged_df = data.merged_df
+    return len(merged_df), lambda: compute_report(merged_df, GAF_COLUMN, BASE_RATE, START_DATE, RUN_ID)
+
+
+def csv_export(data):
+    final_df = data.final_df
+    return len(final_df), lambda: report_csv_bytes(final_df)
+
+
+def xlsx_export(data):
+    if ZIP_CARRIER_ROWS * data.scale > EXCEL_MAX_ROWS:
+        return ZIP_CARRIER_ROWS * data.scale, None
+
+    final_df = data.final_df
+    return len(final_df), lambda: report_xlsx_bytes(final_df)
+
+
+def zip_lookup_bulk(data):
+    store, zips = data.rate_store, data.lookup_zips
+    return len(zips), lambda: store.lookup_many(zips, START_DATE)
+
+
+def zip_lookup_single(data):
+    store = data.rate_store
+    zips = data.lookup_zips[:SINGLE_LOOKUPS * data.scale]
+
+    def call():
+        for zip_code in zips:
+            store.rate_on(zip_code, START_DATE)
+
+    return len(zips), call
+
+
+BENCHMARKS = {
+    func.__name__: func
+    for func in [
+        splitter_extraction,
+        gaf_merge,
+        rate_formatting,
+        csv_export,
+        xlsx_export,
+        zip_lookup_bulk,
+        zip_lookup_single,
+    ]
+}
+
+
+def time_call(func, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+# ---------------------------
+# Results
+# ---------------------------
+def _git(*args):
+    try:
+        return subprocess.run(
+            ["git", *args], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def environment():
+    return {
+        "commit": _git("rev-parse", "--short", "HEAD") or "unknown",
+        "dirty": bool(_git("status", "--porcelain", "--untracked-files=no")),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+    }
+
+
+def save_results(env, results, results_dir=RESULTS_DIR):
+    os.makedirs(results_dir, exist_ok=True)
+    stamp = env["timestamp"].replace(":", "").replace("-", "")[:15]
+    suffix = "-dirty" if env["dirty"] else ""
+    path = os.path.join(results_dir, f"{stamp}-{env['commit']}{suffix}.json")
+
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({**env, "results": results}, f, indent=1)
+    return path
+
+
+def load_previous(path):
+    with open(path, encoding="utf-8") as f:
+        saved = json.load(f)
+    return saved["commit"], {(r["benchmark"], r["scale"]): r["seconds"] for r in saved["results"]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scales", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--benchmark", action="append", choices=list(BENCHMARKS), help="run only these; repeat for several")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--compare", help="earlier results file to compare against")
+    parser.add_argument("--no-save", action="store_true")
+    args = parser.parse_args()
+
+    previous_commit, previous = load_previous(args.compare) if args.compare else (None, {})
+    names = args.benchmark or list(BENCHMARKS)
+    env = environment()
+    results = []
+
+    print(f"commit {env['commit']}{' (dirty)' if env['dirty'] else ''}, python {env['python']}, pandas {env['pandas']}")
+    header = f"{'benchmark':<20} {'scale':>5} {'rows':>11} {'seconds':>9}"
+    print(header + (f" {previous_commit:>9} {'change':>7}" if previous_commit else ""))
+
+    for scale in args.scales:
+        data = Dataset(scale)
+
+        for name in names:
+            rows, call = BENCHMARKS[name](data)
+            if call is None:
+                print(f"{name:<20} {scale:>5}x {rows:>10,} {'skipped':>9}")
+                continue
+
+            seconds = time_call(call, repeat=args.repeat)
+            results.append({"benchmark": name, "scale": scale, "rows": rows, "seconds": round(seconds, 5)})
+
+            line = f"{name:<20} {scale:>5}x {rows:>10,} {seconds:>9.3f}"
+            before = previous.get((name, scale))
+            if before:
+                line += f" {before:>9.3f} {(seconds - before) / before:>+7.0%}"
+            print(line)
+
+    if not args.no_save:
+        print(f"saved {save_results(env, results)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""Compare the xlsx readers used by the GUIDE report on generated CMS workbooks.
+
+Writes a ZIP Code to Carrier Locality workbook (43k rows, all ten CMS
+columns) and an Addendum D workbook with title rows above the header, then
+times the old full pd.read_excel against every engine in cms_source_readers.
+Run from the repository root:
+
+    python -m benchmarks.xlsx_readers --rows 43000
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import pandas as pd
+
+from benchmarks.datasets import make_addendum_d, make_zip_carrier, write_workbooks
+from cms_source_readers import available_engines
+from guide_respite_engine import (
+    ADDENDUM_D_COLUMNS,
+    ADDENDUM_D_HEADER_ROW,
+    ZIP_CARRIER_COLUMNS,
+    prepare_sources,
+    read_addendum_d,
+    read_zip_carrier,
+)
+
+
+def make_workbooks(directory, rows, seed=0):
+    addendum_d = make_addendum_d(seed)
+    return write_workbooks(directory, make_zip_carrier(rows, addendum_d, seed), addendum_d)
+
+
+def old_path(zip_path, addendum_path):
+    # What the report did before: read every column with a fixed header row
+    df1 = pd.read_excel(zip_path)
+    df2 = pd.read_excel(addendum_path, header=ADDENDUM_D_HEADER_ROW)
+    return df1, df2
+
+
+def new_path(zip_path, addendum_path, engine):
+    return read_zip_carrier(zip_path, engine=engine), read_addendum_d(addendum_path, engine=engine)
+
+
+def time_call(func, *args, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=43_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        zip_path, addendum_path = make_workbooks(directory, args.rows)
+        print(f"rows:            {args.rows:,} ({os.path.getsize(zip_path) / 1e6:.1f} MB workbook)")
+
+        old_seconds, (old_df1, old_df2) = time_call(old_path, zip_path, addendum_path, repeat=args.repeat)
+        gaf_columns = ["2025 GAF", "2026 GAF"]
+        expected = prepare_sources(old_df1, old_df2, gaf_columns)
+        print(f"read_excel:      {old_seconds:.3f}s")
+
+        for engine in available_engines():
+            seconds, (df1, df2) = time_call(new_path, zip_path, addendum_path, engine, repeat=args.repeat)
+
+            assert list(df1.columns) == ZIP_CARRIER_COLUMNS
+            assert list(df2.columns) == ADDENDUM_D_COLUMNS + gaf_columns
+            for got, want in zip(prepare_sources(df1, df2, gaf_columns), expected):
+                pd.testing.assert_frame_equal(got, want)
+
+            print(f"{engine + ':':<16} {seconds:.3f}s ({old_seconds / seconds:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""Compare the old row-wise splitter extraction with the vectorized path.
+
+Run from the repository root:
+
+    python -m benchmarks.zipcode_extraction --rows 300000
+"""
+import argparse
+import random
+import time
+
+import pandas as pd
+
+from zipcode_extraction import (
+    extract_zipcodes,
+    extract_zipcodes_rowwise,
+    unique_in_order,
+)
+
+SEPARATORS = [", ", ",", "; ", "/", " | ", " ", "\\", " - "]
+NOISE_TOKENS = ["000", "", "N/A", "9021O", "ab123", "12345-6789"]
+
+
+def make_zip_column(rows, seed=0):
+    rng = random.Random(seed)
+    cells = []
+
+    for _ in range(rows):
+        tokens = [
+            f"{rng.randint(0, 99999):05d}" if rng.random() < 0.85 else rng.choice(NOISE_TOKENS)
+            for _ in range(rng.randint(0, 8))
+        ]
+        cells.append(rng.choice(SEPARATORS).join(tokens))
+
+    return pd.DataFrame({"Zip_Codes": cells}, dtype=str)
+
+
+def old_path(df):
+    # What the splitter did before: iterrows() + per-token checks
+    return extract_zipcodes_rowwise(row["Zip_Codes"] for _, row in df.iterrows())
+
+
+def new_path(df):
+    return extract_zipcodes(df["Zip_Codes"])
+
+
+def time_call(func, *args, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=300_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    df = make_zip_column(args.rows)
+
+    old_seconds, old_result = time_call(old_path, df, repeat=args.repeat)
+    new_seconds, new_result = time_call(new_path, df, repeat=args.repeat)
+
+    assert old_result == new_result, "vectorized extraction differs from the row-wise path"
+    assert unique_in_order(old_result) == unique_in_order(new_result)
+
+    print(f"rows:            {args.rows:,}")
+    print(f"ZIPs extracted:  {len(new_result):,} ({len(unique_in_order(new_result)):,} unique)")
+    print(f"row-wise:        {old_seconds:.3f}s")
+    print(f"vectorized:      {new_seconds:.3f}s")
+    print(f"speedup:         {old_seconds / new_seconds:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+"""Readers for the CMS source workbooks used by the GUIDE report.
+
+read_table() reads only the columns the report needs and finds the header
+row itself (Addendum D has title rows above it), using the fastest
+available xlsx engine:
+
+    calamine   python-calamine, if installed (Rust parser, fastest)
+    openpyxl   openpyxl read-only streaming of cell values
+    pandas     plain pd.read_excel, kept as the reference path
+
+Cell values are converted the way pd.read_excel converts them (whole
+floats become ints, blank cells become NaN, blank rows are skipped), so
+every engine yields the same frame.
+"""
+import csv
+import io
+import os
+
+import pandas as pd
+
+# How far down the sheet to look for the header row
+HEADER_SCAN_ROWS = 20
+
+# Bump whenever a change here (or in the column lists passed in) changes
+# the parsed frames, so caches of parsed files are not reused
+READER_VERSION = 2
+
+
+def available_engines():
+    engines = []
+    try:
+        import python_calamine  # noqa: F401
+        engines.append("calamine")
+    except ImportError:
+        pass
+    return engines + ["openpyxl", "pandas"]
+
+
+def default_engine():
+    return available_engines()[0]
+
+
+# ---------------------------
+# Row sources
+# ---------------------------
+def _openpyxl_rows(source):
+    from openpyxl import load_workbook
+    from openpyxl.cell.cell import ERROR_CODES
+
+    workbook = load_workbook(source, read_only=True, data_only=True, keep_links=False)
+    try:
+        for row in workbook.worksheets[0].iter_rows(values_only=True):
+            yield [None if value in ERROR_CODES else value for value in row]
+    finally:
+        workbook.close()
+
+
+def _calamine_rows(source):
+    from python_calamine import load_workbook
+
+    workbook = load_workbook(source)
+    return workbook.get_sheet_by_index(0).to_python(skip_empty_area=False)
+
+
+def _pandas_rows(source):
+    raw = pd.read_excel(source, header=None)
+    return raw.astype(object).where(raw.notna(), None).itertuples(index=False, name=None)
+
+
+_ROW_READERS = {
+    "calamine": _calamine_rows,
+    "openpyxl": _openpyxl_rows,
+    "pandas": _pandas_rows,
+}
+
+
+def _cell(value):
+    if value is None or value == "":
+        return None
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+def _header_names(row):
+    return ["" if value is None else str(value).strip() for value in row]
+
+
+# ---------------------------
+# Column selection
+# ---------------------------
+def _find_header(rows, required_columns, header):
+    if header is not None:
+        for _ in range(header):
+            next(rows, None)
+        return _header_names(next(rows, ()))
+
+    for row_number, row in enumerate(rows):
+        names = _header_names(row)
+        if set(required_columns) <= set(names):
+            return names
+        if row_number + 1 >= HEADER_SCAN_ROWS:
+            break
+
+    raise ValueError(
+        f"Could not find a header row with columns {list(required_columns)} "
+        f"in the first {HEADER_SCAN_ROWS} rows"
+    )
+
+
+def _wanted(name, required_columns, extra_columns):
+    return name in required_columns or (extra_columns is not None and extra_columns(name))
+
+
+def _frame_from_rows(rows, required_columns, extra_columns, header):
+    rows = iter(rows)
+    names = _find_header(rows, required_columns, header)
+
+    missing = [col for col in required_columns if col not in names]
+    if missing:
+        raise ValueError(f"Missing columns: {missing}")
+
+    keep = [i for i, name in enumerate(names) if _wanted(name, required_columns, extra_columns)]
+
+    data = []
+    for row in rows:
+        values = [_cell(value) for value in row]
+        if any(value is not None for value in values):
+            data.append([values[i] if i < len(values) else None for i in keep])
+
+    return pd.DataFrame(data, columns=[names[i] for i in keep])
+
+
+def _read_bytes(source):
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, "rb") as f:
+            return f.read()
+    if isinstance(source, bytes):
+        return source
+    return source.read()
+
+
+def _read_csv_table(source, required_columns, extra_columns, header):
+    data = _read_bytes(source)
+
+    if header is None:
+        preview = csv.reader(io.StringIO(data[:1 << 16].decode("latin1")))
+        header = next(
+            (
+                row_number
+                for row_number, row in enumerate(preview)
+                if row_number < HEADER_SCAN_ROWS
+                and set(required_columns) <= set(_header_names(row))
+            ),
+            0
+        )
+
+    df = pd.read_csv(
+        io.BytesIO(data),
+        encoding="latin1",
+        skiprows=header,
+        usecols=lambda name: _wanted(str(name).strip(), required_columns, extra_columns)
+    )
+    df.columns = [str(name).strip() for name in df.columns]
+
+    missing = [col for col in required_columns if col not in df.columns]
+    if missing:
+        raise ValueError(f"Missing columns: {missing}")
+
+    return df
+
+
+def read_table(source, required_columns, file_name=None, extra_columns=None, header=None, engine=None):
+    """Read the first sheet of an xlsx (or a CSV) keeping only wanted columns.
+
+    source is a path, bytes or a binary file object; file_name decides
+    between xlsx and CSV when source is not a path. extra_columns is an
+    optional predicate for additional columns to keep by name. header=None
+    finds the first row containing every required column.
+    """
+    if isinstance(source, (str, os.PathLike)):
+        file_name = file_name or os.fspath(source)
+    elif isinstance(source, bytes):
+        source = io.BytesIO(source)
+
+    if not str(file_name).lower().endswith("xlsx"):
+        return _read_csv_table(source, required_columns, extra_columns, header)
+
+    engine = engine or default_engine()
+    if engine not in _ROW_READERS:
+        raise ValueError(f"Unknown xlsx engine {engine!r}; choose from {available_engines()}")
+
+    return _frame_from_rows(_ROW_READERS[engine](source), required_columns, extra_columns, header)
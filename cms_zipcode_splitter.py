@@ -1,9 +1,15 @@
 import streamlit as st
 import pandas as pd
-import re
-from io import StringIO
-import csv
-import math
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import zipfile
+from functools import partial
+
+from app_metrics import RunMetrics, render_debug_panel
+from zipcode_extraction import ZipChunkWriter, process_files
 
 
 st.markdown("""
@@ -16,76 +22,174 @@ st.markdown("""
    **File → Download → Comma-separated values (.csv)**  
    to download your CSV file.
 
-3. Upload that CSV file **here in this tool** using the uploader above.
+3. Upload that CSV file **here in this tool** using the uploader above. Several partner files can be uploaded at once; they are combined into one deduplicated list.
 
 4. This tool will:
    - Clean and extract all valid ZIP codes 
-   - Remove duplicates  
+   - Remove duplicates (across all uploaded files)  
    - Generate one full CSV and multiple chunked CSVs (Excel-safe ≤ 10,000 rows each)
 """)
 
 
 st.title("📍 Zipcode Splitter (Excel-Safe ZIP Codes)")
 
+metrics = RunMetrics("cms_zipcode_splitter")
+
 # Excel max rows = 10,000 → so ZIP rows = 9,999 (header = 1 row)
 MAX_ROWS = 9999
 
-uploaded_file = st.file_uploader(
-    "Upload CSV containing a 'Zip_Codes' column",
-    type=["csv"]
+uploaded_files = st.file_uploader(
+    "Upload one or more CSVs containing a 'Zip_Codes' column",
+    type=["csv"],
+    accept_multiple_files=True
 )
 
-if uploaded_file is not None:
+PREVIEW_ROWS = 1000
+CHUNK_ARCHIVE_NAME = "cms_zipcodes_chunks.zip"
+
+
+# Outputs are cached on disk by upload content hash, so reruns, other
+# sessions and re-uploads of the same files reuse them. The key also holds
+# the chunk size and SPLITTER_CACHE_VERSION; bump the version whenever the
+# extraction or the output files change, so old outputs are not served.
+SPLITTER_CACHE_DIR = os.path.join(tempfile.gettempdir(), "cms_zipcodes_cache")
+SPLITTER_CACHE_ENTRIES = 8
+SPLITTER_CACHE_VERSION = 2
+
+
+def upload_digest(uploaded_files):
+    # File order is part of the key: it decides the output order
+    digest = hashlib.sha256(f"v{SPLITTER_CACHE_VERSION}:{MAX_ROWS}:".encode("ascii"))
+    for uploaded_file in uploaded_files:
+        digest.update(hashlib.sha256(uploaded_file.getvalue()).digest())
+    return digest.hexdigest()
+
+
+def prune_output_cache():
+    entries = [
+        os.path.join(SPLITTER_CACHE_DIR, name)
+        for name in os.listdir(SPLITTER_CACHE_DIR)
+        if not name.startswith(".")
+    ]
+    entries.sort(key=os.path.getmtime, reverse=True)
+
+    for path in entries[SPLITTER_CACHE_ENTRIES:]:
+        shutil.rmtree(path, ignore_errors=True)
+
+
+def process_upload(uploaded_files):
+    digest = upload_digest(uploaded_files)
+    output_dir = os.path.join(SPLITTER_CACHE_DIR, digest)
+    summary_path = os.path.join(output_dir, "summary.json")
+
+    if os.path.exists(summary_path):
+        os.utime(output_dir)
+        with open(summary_path, encoding="utf-8") as f:
+            return json.load(f)
+
+    # Build in a private directory and rename it into place, so a
+    # concurrent session never sees a half-written output
+    os.makedirs(SPLITTER_CACHE_DIR, exist_ok=True)
+    work_dir = tempfile.mkdtemp(prefix=".build-", dir=SPLITTER_CACHE_DIR)
+
+    # Files are parsed in a process pool when the upload is large, then
+    # merged in upload order into one global, order-stable dedup
+    with ZipChunkWriter(work_dir, MAX_ROWS) as writer:
+        stats, file_stats = process_files([f.getvalue() for f in uploaded_files], writer)
+
+    output = {
+        "output_dir": output_dir,
+        "full_file": os.path.basename(writer.full_path),
+        "chunk_files": [os.path.basename(path) for path in writer.chunk_paths],
+        "chunk_rows": writer.chunk_rows,
+        **stats,
+        # Counts only, in upload order: the same bytes may come back under
+        # other names, so names are taken from the current upload
+        "files": file_stats,
+    }
+
+    with open(os.path.join(work_dir, "summary.json"), "w", encoding="utf-8") as f:
+        json.dump(output, f)
+
     try:
-        df = pd.read_csv(
-            uploaded_file,
-            dtype=str,
-            keep_default_na=False,
-            na_filter=False
-        )
-
-        if "Zip_Codes" not in df.columns:
-            st.error("❌ CSV must contain a column named 'Zip_Codes'.")
-            st.stop()
+        os.rename(work_dir, output_dir)
+    except OSError:
+        # Another session finished the same upload first
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    prune_output_cache()
+    return output
+
+
+def read_output_file(output, name):
+    with open(os.path.join(output["output_dir"], name), "rb") as f:
+        return f.read()
 
-        collected = []
-        total_input_rows = len(df)
 
-        for _, row in df.iterrows():
-            raw = str(row["Zip_Codes"])
-            if raw.strip() == "":
-                continue
+def read_chunk_archive(output, metrics):
+    # Built on first request from the chunk files already on disk
+    archive_path = os.path.join(output["output_dir"], CHUNK_ARCHIVE_NAME)
+
+    if not os.path.exists(archive_path):
+        # Every session runs in this process, so each build gets its own
+        # temp file
+        fd, tmp_path = tempfile.mkstemp(prefix=".", suffix=".tmp", dir=output["output_dir"])
+        try:
+            with metrics.stage("build_chunk_archive", files=len(output["chunk_files"])):
+                with os.fdopen(fd, "wb") as f, zipfile.ZipFile(f, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+                    for name in output["chunk_files"]:
+                        archive.write(os.path.join(output["output_dir"], name), arcname=name)
+            os.replace(tmp_path, archive_path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+
+    return read_output_file(output, CHUNK_ARCHIVE_NAME)
+
+
+if uploaded_files:
+    try:
+        missing_column = []
+        for uploaded_file in uploaded_files:
+            header = pd.read_csv(uploaded_file, dtype=str, nrows=0)
+            uploaded_file.seek(0)
+
+            if "Zip_Codes" not in header.columns:
+                missing_column.append(uploaded_file.name)
 
-            parts = re.split(r"[,\s;\|/\\\-]+", raw)
+        if missing_column:
+            st.error(f"❌ CSV must contain a column named 'Zip_Codes': {', '.join(missing_column)}")
+            st.stop()
 
-            for z in parts:
-                z = z.strip()
-                if z == "":
-                    continue
-                if re.search(r"[A-Za-z]", z):
-                    continue
-                if not z.isdigit():
-                    continue
-                if z == "000":
-                    continue
+        # Each file is streamed in chunks and output is written straight to
+        # disk; cached by content hash
+        with metrics.stage(
+            "process_upload",
+            files=len(uploaded_files),
+            file_bytes=sum(f.size for f in uploaded_files)
+        ) as record:
+            output = process_upload(uploaded_files)
+            record["input_rows"] = output["input_rows"]
 
-                collected.append(z)
+        total_input_rows = output["input_rows"]
 
         # Stats BEFORE deduplication
-        total_parsed_zipcodes = len(collected)
+        total_parsed_zipcodes = output["parsed_zipcodes"]
 
         # GLOBAL DEDUPLICATION
-        unique_zipcodes = list(dict.fromkeys(collected))
-        final_unique_count = len(unique_zipcodes)
-
-        # Excel-safe formatting
-        df_excel = pd.DataFrame(
-            {"Zip_Codes": [f'="{z}"' for z in unique_zipcodes]},
-            dtype=str
-        )
+        final_unique_count = output["unique_zipcodes"]
+
+        # Excel-safe formatting (preview only; full output lives on disk)
+        with metrics.stage("read_preview"):
+            df_excel = pd.read_csv(
+                os.path.join(output["output_dir"], output["chunk_files"][0]),
+                dtype=str,
+                keep_default_na=False,
+                nrows=PREVIEW_ROWS
+            )
 
-        # Correct chunk calculation for 9,999 rows + header
-        num_files = max(1, math.ceil(final_unique_count / MAX_ROWS))
+        # One chunk file per 9,999 ZIP rows + header
+        num_files = len(output["chunk_files"])
 
         # ------------------------
         # 📊 SUMMARY PANEL
@@ -101,9 +205,27 @@ if uploaded_file is not None:
         **Total output chunk files:** {num_files}  
         """)
 
+        if len(output["files"]) > 1:
+            st.markdown("#### Per-file breakdown")
+            st.dataframe(
+                pd.DataFrame([
+                    {
+                        "File": uploaded_file.name,
+                        "Input rows": file_stat["input_rows"],
+                        "ZIP entries parsed": file_stat["parsed_zipcodes"],
+                        "Unique ZIPs in file": file_stat["unique_zipcodes"],
+                        "New ZIPs (not in earlier files)": file_stat["new_zipcodes"],
+                    }
+                    for uploaded_file, file_stat in zip(uploaded_files, output["files"])
+                ]),
+                hide_index=True
+            )
+
         # Display output table
         st.subheader("📌 Final ZIP Codes (Excel-friendly, leading zeros preserved)")
         st.write(f"Total ZIP entries: **{final_unique_count}**")
+        if final_unique_count > PREVIEW_ROWS:
+            st.caption(f"Showing the first {PREVIEW_ROWS:,} ZIP codes. Download the files below for the full list.")
         st.dataframe(df_excel)
 
         st.markdown("""
@@ -123,30 +245,28 @@ if uploaded_file is not None:
 
 
         # EXPORT FUNCTIONS
-        def export_single_file(df_output):
-            buf = StringIO()
-            df_output.to_csv(buf, index=False, quoting=csv.QUOTE_MINIMAL)
-
+        # Files are read from disk only when a button is clicked
+        def export_single_file(output):
             st.download_button(
                 "📥 Download FULL file",
-                buf.getvalue(),
+                partial(read_output_file, output, output["full_file"]),
                 "cms_zipcodes_full.csv",
                 mime="text/csv"
             )
 
-        def export_chunks(df_output):
-            for i in range(num_files):
-                start = i * MAX_ROWS
-                end = start + MAX_ROWS
-
-                chunk = df_output.iloc[start:end]
-
-                buf = StringIO()
-                chunk.to_csv(buf, index=False, quoting=csv.QUOTE_MINIMAL)
+        def export_archive(output):
+            st.download_button(
+                f"📦 Download all {num_files} chunk files (.zip)",
+                partial(read_chunk_archive, output, metrics),
+                CHUNK_ARCHIVE_NAME,
+                mime="application/zip"
+            )
 
+        def export_chunks(output):
+            for i in range(num_files):
                 st.download_button(
-                    f"📥 Download cms_zipcodes_{i+1}.csv ({len(chunk)} rows)",
-                    buf.getvalue(),
+                    f"📥 Download cms_zipcodes_{i+1}.csv ({output['chunk_rows'][i]} rows)",
+                    partial(read_output_file, output, output["chunk_files"][i]),
                     f"cms_zipcodes_{i+1}.csv",
                     mime="text/csv"
                 )
@@ -154,10 +274,13 @@ if uploaded_file is not None:
         # DOWNLOAD BUTTONS
         st.markdown("## ⬇️ Downloads")
 
-        export_single_file(df_excel)
-        export_chunks(df_excel)
+        export_single_file(output)
+        export_archive(output)
+        export_chunks(output)
 
         st.success("🎉 Done! Chunk files are now capped at 9,999 ZIP rows (10,000 including header).")
 
     except Exception as e:
         st.error(f"⚠️ Error: {e}")
+
+render_debug_panel(metrics)
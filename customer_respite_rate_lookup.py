@@ -1,9 +1,24 @@
 import streamlit as st
 import pandas as pd
-import os
 import streamlit.components.v1 as components
 import io
+import re
 import zipfile
+from datetime import date
+
+from app_metrics import RunMetrics, render_debug_panel
+from respite_rate_index import artifacts_signature
+from respite_rate_store import (
+    MATCH_EXACT,
+    MATCH_PREFIX,
+    MATCH_PREFIX_AMBIGUOUS,
+    RateStoreLoader,
+    download_name,
+    get_period,
+    period_on,
+    read_period_file,
+    valid_date_text,
+)
 
 # -----------------------------------------
 # Page configuration
@@ -11,28 +26,22 @@ import zipfile
 st.set_page_config(page_title="Respite Lookup", layout="centered")
 st.image("PocketRN_Logo.png", width=120)
 
+metrics = RunMetrics("customer_respite_rate_lookup")
+
 # -----------------------------------------
 # Data loader
 # -----------------------------------------
-@st.cache_data
-def load_period_data(period_key):
-    filename_map = {
-        "July 1, 2025 – December 31, 2025": "respite_rate_geography_2025.csv",
-        "January 1, 2026 – January 31, 2026": "respite_rate_geography_2026_jan.csv",
-        "February 1, 2026 – June 30, 2026": "respite_rate_geography_2026_feb.csv",
-        "July 1, 2026 – Onwards": "respite_rate_geography_2026_july.csv"
-    }
-
-    filename = filename_map.get(period_key)
+@st.cache_resource(max_entries=1)
+def rate_data_loader(artifacts):
+    # All periods merged into one versioned store, loaded in a background
+    # thread that starts with the first page view; period CSVs come from
+    # the snapshot store or a compiled index, and periods published by the
+    # GUIDE report are loaded as they are. Keyed on the published
+    # artifacts, so a new publish is loaded on the next page view
+    return RateStoreLoader()
 
-    if not filename or not os.path.exists(filename):
-        st.error(f"Could not find file: {filename}")
-        return None, None
 
-    df = pd.read_csv(filename, dtype={"ZIP CODE": str})
-    df["ZIP CODE"] = df["ZIP CODE"].str.extract(r'="?([0-9]+)"?')[0]
-
-    return df, filename
+loader = rate_data_loader(artifacts_signature())
 
 # -----------------------------------------
 # Custom CSS
@@ -144,52 +153,166 @@ st.markdown(
 # Period + ZIP selectors
 # -----------------------------------------
 
+lookup_mode = st.radio(
+    "Lookup mode",
+    ["Single ZIP Code", "Bulk lookup"],
+    horizontal=True,
+    label_visibility="collapsed"
+)
+
+periods = loader.periods
+
 period_col, zip_col = st.columns(2)
 
 with period_col:
-    period_options = [
-        "July 1, 2025 – December 31, 2025",
-        "January 1, 2026 – January 31, 2026",
-        "February 1, 2026 – June 30, 2026",
-        "July 1, 2026 – Onwards"
-    ]
+    period_options = [period.label for period in periods]
+
+    # Open on the rates in effect today, not on a period published ahead
+    current_period = period_on(date.today(), periods)
 
     selected_period = st.selectbox(
         "📅 Select Period:",
         period_options,
-        index=period_options.index("July 1, 2026 – Onwards")
+        index=periods.index(current_period) if current_period else len(period_options) - 1
+    )
+
+period = get_period(selected_period, periods)
+
+# Readiness indicator: only the first visitor after a restart waits here
+if not loader.ready:
+    with st.spinner("Loading respite rate tables..."), metrics.stage("wait_for_rate_store") as record:
+        loader.wait()
+        record["load_seconds"] = loader.seconds
+
+if loader.error is not None:
+    st.error(f"Could not load respite rates: {loader.error}")
+
+for filename in loader.missing:
+    st.error(f"Could not find file: {filename}")
+
+rate_store = loader.store
+
+selected_zip = None
+ZIP_SEARCH_LIMIT = 20
+
+if lookup_mode == "Single ZIP Code":
+    with zip_col:
+        # Server-side prefix search: only the top matches are sent to the
+        # browser instead of every ZIP in the period
+        zip_query = st.text_input(
+            "📍 Enter your ZIP Code:",
+            max_chars=5,
+            placeholder="e.g. 02134"
+        ).strip()
+
+        if len(zip_query) == 5:
+            selected_zip = zip_query
+        elif zip_query and rate_store is not None:
+            with metrics.stage("zip_search", prefix_length=len(zip_query)):
+                zip_matches = rate_store.search_zip_codes(zip_query, period.start, limit=ZIP_SEARCH_LIMIT)
+
+            if zip_matches:
+                selected_zip = st.selectbox("Matching ZIP Codes:", [""] + zip_matches)
+            else:
+                st.caption("No ZIP Codes start with those digits.")
+
+
+# -----------------------------------------
+# Bulk lookup
+# -----------------------------------------
+def read_bulk_zip_codes(uploaded_file, pasted_text):
+    zip_values = []
+
+    if uploaded_file is not None:
+        upload_df = pd.read_csv(
+            uploaded_file,
+            dtype=str,
+            keep_default_na=False,
+            na_filter=False
+        )
+        zip_columns = [col for col in upload_df.columns if "ZIP" in str(col).upper()]
+        zip_column = zip_columns[0] if zip_columns else upload_df.columns[0]
+        zip_values.extend(upload_df[zip_column].tolist())
+
+    if pasted_text:
+        zip_values.extend(re.findall(r"[^\s,;|]+", pasted_text))
+
+    return zip_values
+
+
+if lookup_mode == "Bulk lookup":
+    with zip_col:
+        bulk_file = st.file_uploader(
+            "📁 Upload a CSV of ZIP Codes:",
+            type=["csv"]
+        )
+
+    pasted_zips = st.text_area(
+        "Or paste ZIP Codes (one per line, or separated by commas/spaces):",
+        height=150
     )
 
-df, filename = load_period_data(selected_period)
+    with metrics.stage("bulk_parse") as record:
+        bulk_zips = read_bulk_zip_codes(bulk_file, pasted_zips)
+        record["zip_codes"] = len(bulk_zips)
+
+    if not bulk_zips:
+        st.info("Upload a CSV or paste ZIP Codes to look them up.")
+    elif rate_store is not None:
+        with metrics.stage("bulk_lookup", zip_codes=len(bulk_zips)):
+            bulk_df = rate_store.lookup_many(bulk_zips, period.start)
+        found_count = int((bulk_df["Match"] == MATCH_EXACT).sum())
+        estimated_count = int(bulk_df["Match"].isin([MATCH_PREFIX, MATCH_PREFIX_AMBIGUOUS]).sum())
+
+        st.markdown(f"**{found_count:,} of {len(bulk_df):,} ZIP Codes found** ({valid_date_text(period)})")
+        if estimated_count:
+            st.caption(
+                f"{estimated_count:,} ZIP Codes not in the rate file were estimated from their "
+                "first three digits; see the Match and Confidence columns."
+            )
+        st.dataframe(bulk_df, hide_index=True)
+
+        with metrics.stage("bulk_export", rows=len(bulk_df)):
+            bulk_csv = bulk_df.to_csv(index=False, float_format="%.2f").encode("utf-8")
 
-with zip_col:
-    zip_codes = sorted(df["ZIP CODE"].unique()) if df is not None else []
-    selected_zip = st.selectbox("📍 Select your ZIP Code:", [""] + zip_codes)
+        st.download_button(
+            "⬇️ Download results (.csv)",
+            data=bulk_csv,
+            file_name="respite_rate_bulk_lookup.csv",
+            mime="text/csv"
+        )
 
 
 # -----------------------------------------
 # Display results
 # -----------------------------------------
-if not selected_zip:
-    st.info("Please select a ZIP Code.")
-else:
-    row = df[df["ZIP CODE"] == selected_zip]
-
-    if not row.empty:
-        geography = row.iloc[0]["Geography"]
-        rate = float(row.iloc[0]["Respite Reimbursement Rate ($/hr)"])
-
-        if selected_period == "July 1, 2025 – December 31, 2025":
-            valid_date_text = "Valid July 1, 2025 – December 31, 2025"
-        elif selected_period == "January 1, 2026 – January 31, 2026":
-            valid_date_text = "Valid January 1, 2026 – January 31, 2026"
-        elif selected_period == "February 1, 2026 – June 30, 2026":
-            valid_date_text = "Valid February 1, 2026 – June 30, 2026"
-        elif selected_period == "July 1, 2026 – Onwards":
-            valid_date_text = "Valid July 1, 2026 – Onwards"
+if lookup_mode == "Single ZIP Code" and not selected_zip:
+    st.info("Please enter a ZIP Code.")
+elif selected_zip and rate_store is not None:
+    with metrics.stage("single_lookup") as record:
+        result = rate_store.rate_on(selected_zip, period.start)
+
+        # Not in the period file: best guess from the ZIP3 prefix
+        estimate = None
+        if result is None:
+            estimate = rate_store.estimate_on(selected_zip, period.start)
+            record["estimated"] = estimate is not None
+            if estimate is not None:
+                result = estimate.geography, estimate.rate
+
+    if estimate is not None:
+        note = (
+            f"ZIP Code {selected_zip} is not in the rate file. This is an estimate from nearby "
+            f"ZIP Codes: {estimate.share:.0%} of the {estimate.zip_count:,} ZIP Codes starting "
+            f"with {estimate.prefix} are in {estimate.geography}."
+        )
+        if estimate.ambiguous:
+            st.warning(f"⚠️ {note} ZIP Codes with this prefix span more than one geography, so please confirm it.")
         else:
-            valid_date_text = None
+            st.info(note)
 
+    if result is not None:
+        geography, rate = result
 
         col1, col2 = st.columns(2)
 
@@ -219,7 +342,7 @@ else:
         </div>
 
         <div style="font-size: 15px; font-weight: 700; color: #444; margin-bottom: 10px;">
-            {valid_date_text}
+            {valid_date_text(period)}
         </div>
 
         <div class="respite-note">
@@ -245,10 +368,8 @@ st.markdown("### Download Respite Rate Files")
 st.write("Select one or more files and download them as a single ZIP file.")
 
 download_files = {
-    "July 1, 2025 – December 31, 2025 Rates": "respite_rate_geography_2025.csv",
-    "January 1, 2026 – January 31, 2026 Rates": "respite_rate_geography_2026_jan.csv",
-    "February 1, 2026 – June 30, 2026 Rates": "respite_rate_geography_2026_feb.csv",
-    "July 1, 2026 – Onwards Rates": "respite_rate_geography_2026_july.csv"
+    f"{rate_period.label} Rates": rate_period
+    for rate_period in periods
 }
 
 selected_downloads = st.multiselect(
@@ -260,12 +381,14 @@ if selected_downloads:
 
     zip_buffer = io.BytesIO()
 
-    with zipfile.ZipFile(zip_buffer, "w") as zip_file:
-        for label in selected_downloads:
-            file_path = download_files[label]
+    with metrics.stage("download_archive", files=len(selected_downloads)):
+        with zipfile.ZipFile(zip_buffer, "w") as zip_file:
+            for label in selected_downloads:
+                rate_period = download_files[label]
+                file_data = read_period_file(rate_period.filename)
 
-            if os.path.exists(file_path):
-                zip_file.write(file_path, arcname=os.path.basename(file_path))
+                if file_data is not None:
+                    zip_file.writestr(download_name(rate_period), file_data)
 
     zip_buffer.seek(0)
 
@@ -275,3 +398,5 @@ if selected_downloads:
         file_name="respite_rate_files.zip",
         mime="application/zip"
     )
+
+render_debug_panel(metrics)
@@ -1,6 +1,6 @@
 import streamlit as st
-import gspread
-from google.oauth2.service_account import Credentials
+
+from gsheet_sync import SheetMirror, authorize
 
 st.title("Read & Update Google Sheet")
 
@@ -8,26 +8,27 @@ st.title("Read & Update Google Sheet")
 
 @st.cache_resource
 def get_gsheet_client():
-    scopes = [
-        "https://www.googleapis.com/auth/spreadsheets",
-        "https://www.googleapis.com/auth/drive",
-    ]
-    creds = Credentials.from_service_account_info(
-        st.secrets["gcp_service_account"],
-        scopes=scopes,
-    )
-    return gspread.authorize(creds)
+    return authorize(st.secrets["gcp_service_account"])
+
+@st.cache_resource
+def get_sheet_mirror(sheet_url):
+    # Shared by every session, so reruns and saves don't re-read the sheet
+    worksheet = get_gsheet_client().open_by_url(sheet_url).worksheet("Sheet1")
+    return SheetMirror(worksheet, key_column="Email")
 
-client = get_gsheet_client()
-sheet = client.open_by_url(st.secrets["config"]["sheet_url"])
-worksheet = sheet.worksheet("Sheet1")  
+mirror = get_sheet_mirror(st.secrets["config"]["sheet_url"])
 
+if st.button("🔄 Refresh from sheet"):
+    mirror.refresh(force=True)
 
-data = worksheet.get_all_records()  
+data = mirror.records()
 
 st.subheader("Existing Data")
 st.dataframe(data)
 
+if mirror.pending:
+    st.warning(f"{mirror.pending} edit(s) not yet saved to the sheet; Save again to retry.")
+
 st.subheader("Add or Update Record")
 
 name = st.text_input("Name")
@@ -37,20 +38,13 @@ score = st.number_input("Score", min_value=0, max_value=100, step=1)
 
 if st.button("Save"):
     try:
-        email_list = worksheet.col_values(2)  
-
-        if email in email_list:
-            row_index = email_list.index(email) + 1  
-
-            worksheet.update(
-                f"A{row_index}:D{row_index}",
-                [[name, email, city, score]],
-            )
+        exists = mirror.get(email) is not None
+        mirror.upsert({"Name": name, "Email": email, "City": city, "Score": score})
+        mirror.flush()
 
+        if exists:
             st.success(f"Updated existing record for {email}")
-
         else:
-            worksheet.append_row([name, email, city, score])
             st.success("New record added")
 
     except Exception as e:
@@ -0,0 +1,471 @@
+import json
+import random
+import threading
+import time
+from collections import Counter
+
+import gspread
+import numpy as np
+from google.oauth2.service_account import Credentials
+from gspread.exceptions import APIError, WorksheetNotFound
+from gspread.utils import ValueRenderOption, a1_range_to_grid_range, rowcol_to_a1
+from requests import Response
+
+SCOPES = [
+    "https://www.googleapis.com/auth/spreadsheets",
+    "https://www.googleapis.com/auth/drive",
+]
+
+
+def authorize(service_account_info):
+    creds = Credentials.from_service_account_info(service_account_info, scopes=SCOPES)
+    return gspread.authorize(creds)
+
+
+# -----------------------------------------
+# Google Sheet mirror
+# -----------------------------------------
+# Reading the whole sheet and scanning a column on every save costs
+# several API calls each time. SheetMirror keeps the sheet's values in
+# memory with a key -> row index, so reads and lookups are free:
+#
+#   mirror = SheetMirror(worksheet, key_column="Email")
+#   mirror.records()                     # refetched at most every ttl seconds
+#   mirror.upsert({"Name": ..., "Email": ..., "City": ..., "Score": ...})
+#   mirror.flush()                       # one batch_update + one append_rows
+#
+# Edits show in records() at once and are queued; flush writes all
+# queued updates of existing rows in one batch_update and all new rows in
+# one append_rows. New rows are appended by the API rather than written to
+# a guessed row number, so two sessions adding rows never overwrite each
+# other. Updates are written by row number, so when the mirror is older
+# than verify_age the key column is re-read first; if a row to update no
+# longer holds its key (rows were deleted or sorted), the sheet is
+# refetched before writing.
+
+DEFAULT_TTL = 60
+DEFAULT_VERIFY_AGE = 5
+
+
+def _column_letter(column):
+    return rowcol_to_a1(1, column)[:-1]
+
+
+class SheetMirror:
+    def __init__(self, worksheet, key_column, ttl=DEFAULT_TTL, verify_age=DEFAULT_VERIFY_AGE, clock=time.monotonic):
+        self.worksheet = worksheet
+        self.key_column = key_column
+        self.ttl = ttl
+        self.verify_age = verify_age
+        self.clock = clock
+
+        # The sheet as last fetched (plus our flushed edits); row_pos 0 is
+        # sheet row 2, under the header
+        self.header = []
+        self.rows = []
+        self.index = {}
+        self.loaded_at = None
+
+        # Queued edits, key -> row values: updates of indexed rows and new
+        # rows to append, each in the order they were queued
+        self._updates = {}
+        self._appends = {}
+        self._lock = threading.RLock()
+
+    def _key_position(self):
+        try:
+            return self.header.index(self.key_column)
+        except ValueError:
+            raise KeyError(f"Sheet has no '{self.key_column}' column") from None
+
+    def _row_key(self, row, key_pos):
+        return str(row[key_pos]).strip() if key_pos < len(row) else ""
+
+    def _index_row(self, row_pos, key_pos):
+        # First row wins for duplicate keys, as col_values().index() did
+        key = self._row_key(self.rows[row_pos], key_pos)
+        if key and (key not in self.index or self.index[key] > row_pos):
+            self.index[key] = row_pos
+
+    def _reindex_keys(self, keys, key_pos):
+        # A key whose first row changed may still be on a later, unchanged
+        # row (a duplicate), so find each one's first row again
+        for key in keys:
+            self.index.pop(key, None)
+
+        for row_pos, row in enumerate(self.rows):
+            key = self._row_key(row, key_pos)
+            if key in keys and key not in self.index:
+                self.index[key] = row_pos
+
+    # ---------------------------
+    # Reading
+    # ---------------------------
+    def refresh(self, force=False):
+        """Refetch the sheet if the mirror is older than ttl (or force).
+
+        Only rows whose values changed are re-indexed. Returns the number
+        of changed rows, or None if the mirror was still fresh.
+        """
+        with self._lock:
+            if not force and self.loaded_at is not None and self.clock() - self.loaded_at < self.ttl:
+                return None
+
+            values = self.worksheet.get_all_values(
+                value_render_option=ValueRenderOption.unformatted
+            )
+            header, rows = (values[0], values[1:]) if values else ([], [])
+
+            if header != self.header or len(rows) < len(self.rows):
+                # Columns changed or rows were deleted: positions moved
+                self.header, self.rows, self.index = header, [], {}
+
+            key_pos = self._key_position()
+            changed = []
+            dropped = set()
+
+            for row_pos, row in enumerate(rows):
+                if row_pos < len(self.rows):
+                    if self.rows[row_pos] == row:
+                        continue
+                    old_key = self._row_key(self.rows[row_pos], key_pos)
+                    if self.index.get(old_key) == row_pos:
+                        dropped.add(old_key)
+                    self.rows[row_pos] = row
+                else:
+                    self.rows.append(row)
+                changed.append(row_pos)
+
+            for row_pos in changed:
+                self._index_row(row_pos, key_pos)
+
+            if dropped:
+                self._reindex_keys(dropped, key_pos)
+
+            # Another session may have added or removed a queued key
+            queued = {**self._updates, **self._appends}
+            self._updates = {k: v for k, v in queued.items() if k in self.index}
+            self._appends = {k: v for k, v in queued.items() if k not in self.index}
+
+            self.loaded_at = self.clock()
+            return len(changed)
+
+    def records(self):
+        """Rows as dicts keyed by the header, like get_all_records().
+
+        Queued edits are shown as if they were already saved.
+        """
+        with self._lock:
+            self.refresh()
+            rows = list(self.rows)
+            for key, values in self._updates.items():
+                rows[self.index[key]] = values
+            rows.extend(self._appends.values())
+
+            width = len(self.header)
+            return [
+                dict(zip(self.header, list(row[:width]) + [""] * (width - len(row))))
+                for row in rows
+            ]
+
+    def get(self, key):
+        with self._lock:
+            self.refresh()
+            key = str(key).strip()
+            values = self._updates.get(key) or self._appends.get(key)
+            if values is None and key in self.index:
+                values = self.rows[self.index[key]]
+            return None if values is None else dict(zip(self.header, values))
+
+    # ---------------------------
+    # Writing
+    # ---------------------------
+    def upsert(self, record):
+        """Queue a record (a dict keyed by header names) for the next flush."""
+        with self._lock:
+            self.refresh()
+            values = [record.get(column, "") for column in self.header]
+            key = self._row_key(values, self._key_position())
+            if not key:
+                raise ValueError(f"'{self.key_column}' is required")
+
+            if key in self.index:
+                self._updates[key] = values
+            else:
+                self._appends[key] = values
+
+    @property
+    def pending(self):
+        return len(self._updates) + len(self._appends)
+
+    def _update_rows_moved(self):
+        # One read of the key column: does every row about to be
+        # overwritten still hold the key it was indexed under?
+        key_pos = self._key_position()
+        sheet_keys = self.worksheet.col_values(
+            key_pos + 1, value_render_option=ValueRenderOption.unformatted
+        )[1:]
+
+        return any(
+            self.index[key] >= len(sheet_keys) or str(sheet_keys[self.index[key]]).strip() != key
+            for key in self._updates
+        )
+
+    def flush(self):
+        """Write queued edits; returns (updated, appended) row counts.
+
+        On an API error the unwritten edits stay queued for the next flush
+        and the mirror is refetched on its next read.
+        """
+        with self._lock:
+            if not self.pending:
+                return 0, 0
+
+            stale = self.loaded_at is None or self.clock() - self.loaded_at >= self.verify_age
+            if self._updates and stale and self._update_rows_moved():
+                self.refresh(force=True)
+
+            updates, appends = self._updates, self._appends
+            last_column = _column_letter(len(self.header))
+            key_pos = self._key_position() if appends else None
+
+            try:
+                if updates:
+                    # +2: the header row and 1-based sheet rows
+                    self.worksheet.batch_update([
+                        {
+                            "range": f"A{self.index[key] + 2}:{last_column}{self.index[key] + 2}",
+                            "values": [values],
+                        }
+                        for key, values in updates.items()
+                    ])
+                    for key, values in updates.items():
+                        self.rows[self.index[key]] = values
+                    self._updates = {}
+
+                if appends:
+                    response = self.worksheet.append_rows(list(appends.values()))
+                    self._appends = {}
+                    self._place_appended(list(appends.values()), response, key_pos)
+            except Exception:
+                self.loaded_at = None
+                raise
+
+            return len(updates), len(appends)
+
+    def _place_appended(self, rows, response, key_pos):
+        # The API reports where the rows landed; if another session appended
+        # in between they are not right after our rows, so refetch instead
+        updated_range = (response or {}).get("updates", {}).get("updatedRange", "")
+        first_row = a1_range_to_grid_range(updated_range.split("!")[-1]).get("startRowIndex")
+
+        if first_row != len(self.rows) + 1:
+            self.loaded_at = None
+            return
+
+        for values in rows:
+            self.rows.append(values)
+            self._index_row(len(self.rows) - 1, key_pos)
+
+
+# -----------------------------------------
+# Bulk publish
+# -----------------------------------------
+# A 43k-row report is ~260k cells; appended row by row that is 43k write
+# requests against a quota of 60 per minute. publish_frame writes it as a
+# few range writes instead: every request carries up to
+# MAX_CELLS_PER_REQUEST cells (~1 MB of JSON), and requests rejected for
+# quota or a server error are retried with exponential backoff.
+
+MAX_CELLS_PER_REQUEST = 50_000
+MAX_RETRIES = 6
+BACKOFF_SECONDS = 2
+BACKOFF_MAX_SECONDS = 64
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+
+def frame_values(df):
+    """Header plus rows as JSON-safe lists; missing values become ""."""
+    body = df.astype(object).where(df.notna(), "").to_numpy().tolist()
+    for row in body:
+        for col, value in enumerate(row):
+            if isinstance(value, np.generic):
+                row[col] = value.item()
+            elif not isinstance(value, (str, int, float, bool)):
+                row[col] = str(value)
+
+    return [[str(col) for col in df.columns]] + body
+
+
+def is_retryable(error):
+    return isinstance(error, APIError) and error.code in RETRY_STATUS
+
+
+def with_retries(call, retries=MAX_RETRIES, sleep=time.sleep, on_retry=None):
+    """Run call(), backing off on quota and server errors."""
+    for attempt in range(retries + 1):
+        try:
+            return call()
+        except Exception as e:
+            if attempt == retries or not is_retryable(e):
+                raise
+
+            delay = min(BACKOFF_MAX_SECONDS, BACKOFF_SECONDS * 2 ** attempt)
+            delay += random.uniform(0, delay / 2)
+            if on_retry:
+                on_retry(e, delay)
+            sleep(delay)
+
+
+def publish_frame(worksheet, df, progress=None, on_retry=None, max_cells=MAX_CELLS_PER_REQUEST, retries=MAX_RETRIES, sleep=time.sleep):
+    """Replace the worksheet's contents with df; returns the write requests made.
+
+    The sheet is resized to the frame first, which also drops rows left
+    over from a longer earlier publish. Values are written RAW, so ZIP
+    codes keep their leading zeros. progress(rows_written, total_rows) is
+    called after every request and on_retry(error, delay) before a backoff.
+    """
+    values = frame_values(df)
+    n_cols = len(values[0])
+    last_column = _column_letter(n_cols)
+    rows_per_request = max(1, max_cells // n_cols)
+
+    with_retries(lambda: worksheet.resize(rows=len(values), cols=n_cols), retries, sleep, on_retry)
+
+    requests = 0
+    for first in range(0, len(values), rows_per_request):
+        chunk = values[first:first + rows_per_request]
+        data = [{
+            "range": f"A{first + 1}:{last_column}{first + len(chunk)}",
+            "values": chunk,
+        }]
+        with_retries(lambda: worksheet.batch_update(data), retries, sleep, on_retry)
+
+        requests += 1
+        if progress:
+            progress(first + len(chunk) - 1, len(values) - 1)
+
+    return requests
+
+
+def publish_to_sheet(spreadsheet, title, df, **kwargs):
+    """publish_frame into the tab called title, adding the tab if needed."""
+    try:
+        worksheet = spreadsheet.worksheet(title)
+    except WorksheetNotFound:
+        worksheet = with_retries(
+            lambda: spreadsheet.add_worksheet(title, rows=len(df) + 1, cols=len(df.columns)),
+            kwargs.get("retries", MAX_RETRIES),
+            kwargs.get("sleep", time.sleep),
+            kwargs.get("on_retry"),
+        )
+
+    return worksheet, publish_frame(worksheet, df, **kwargs)
+
+
+# -----------------------------------------
+# Local stand-in for a gspread Worksheet
+# -----------------------------------------
+class LocalWorksheet:
+    """In-memory worksheet with the gspread calls SheetMirror uses.
+
+    Counts API calls in .calls so round trips can be checked offline:
+
+        ws = LocalWorksheet([["Name", "Email", "City", "Score"]])
+        mirror = SheetMirror(ws, "Email")
+    """
+
+    def __init__(self, values=None, title="Sheet1", rows=1000, cols=26, quota_errors=0):
+        self.title = title
+        self.values = [list(row) for row in values or []]
+        self.row_count = max(rows, len(self.values))
+        self.col_count = cols
+        self.calls = Counter()
+
+        # The next quota_errors write calls fail with a 429, as the API does
+        self.quota_errors = quota_errors
+
+    def _check_quota(self, call):
+        self.calls[call] += 1
+        if self.quota_errors:
+            self.quota_errors -= 1
+            response = Response()
+            response.status_code = 429
+            response._content = json.dumps({"error": {
+                "code": 429, "status": "RESOURCE_EXHAUSTED",
+                "message": "Quota exceeded for quota metric 'Write requests'",
+            }}).encode("utf-8")
+            raise APIError(response)
+
+    def get_all_values(self, **kwargs):
+        self.calls["get_all_values"] += 1
+        width = max((len(row) for row in self.values), default=0)
+        return [list(row) + [""] * (width - len(row)) for row in self.values]
+
+    def col_values(self, col, **kwargs):
+        self.calls["col_values"] += 1
+        column = [row[col - 1] if col - 1 < len(row) else "" for row in self.values]
+        while column and column[-1] == "":
+            column.pop()
+        return column
+
+    def _write(self, first_row, first_col, values):
+        for row_offset, row in enumerate(values):
+            row_pos = first_row - 1 + row_offset
+            if row_pos >= self.row_count:
+                raise ValueError(f"Range exceeds grid limits: row {row_pos + 1} > {self.row_count}")
+
+            while len(self.values) <= row_pos:
+                self.values.append([])
+            target = self.values[row_pos]
+            while len(target) < first_col - 1 + len(row):
+                target.append("")
+            target[first_col - 1:first_col - 1 + len(row)] = row
+
+    def resize(self, rows=None, cols=None):
+        self._check_quota("resize")
+        if rows is not None:
+            self.row_count = rows
+            del self.values[rows:]
+        if cols is not None:
+            self.col_count = cols
+            for row in self.values:
+                del row[cols:]
+
+    def batch_update(self, data, **kwargs):
+        self._check_quota("batch_update")
+        for item in data:
+            grid = a1_range_to_grid_range(item["range"].split("!")[-1])
+            self._write(grid["startRowIndex"] + 1, grid.get("startColumnIndex", 0) + 1, item["values"])
+        return {"totalUpdatedRows": sum(len(item["values"]) for item in data)}
+
+    def append_rows(self, values, **kwargs):
+        self._check_quota("append_rows")
+        while self.values and not any(str(v) for v in self.values[-1]):
+            self.values.pop()
+
+        first_row = len(self.values) + 1
+        self.row_count = max(self.row_count, first_row + len(values) - 1)
+        self._write(first_row, 1, values)
+
+        last_row = first_row + len(values) - 1
+        width = max(len(row) for row in values)
+        updated = f"{self.title}!A{first_row}:{rowcol_to_a1(last_row, width)}"
+        return {"updates": {"updatedRange": updated, "updatedRows": len(values)}}
+
+
+class LocalSpreadsheet:
+    """In-memory spreadsheet of LocalWorksheet tabs."""
+
+    def __init__(self, worksheets=()):
+        self.worksheets = {ws.title: ws for ws in worksheets}
+
+    def worksheet(self, title):
+        try:
+            return self.worksheets[title]
+        except KeyError:
+            raise WorksheetNotFound(title) from None
+
+    def add_worksheet(self, title, rows, cols, **kwargs):
+        self.worksheets[title] = LocalWorksheet(title=title, rows=rows, cols=cols)
+        return self.worksheets[title]
@@ -0,0 +1,501 @@
+"""GUIDE respite rate report engine.
+
+Turns the CMS ZIP Code to Carrier Locality file and the Addendum D
+Geographic Adjustment Factors file into the "Look up Respite Rate" table.
+Used by guide_respite_zipcode.py and runnable headless:
+
+    python guide_respite_engine.py \
+        --zip-file ZIP5_JAN2026.xlsx \
+        --addendum-d "Addendum D Geographic Adjustment Factors.xlsx" \
+        --base-rate 32.17 --base-rate 33.00 \
+        --start-date 2026-07-01 \
+        --output-dir reports
+
+With a single GAF column and base rate, --publish also publishes the report
+for customer_respite_rate_lookup.py, effective from --start-date.
+"""
+import argparse
+import io
+import os
+import sys
+from datetime import date, datetime
+
+import numpy as np
+import pandas as pd
+import xlsxwriter
+
+from cms_source_readers import available_engines, read_table
+from respite_rate_index import (
+    ARTIFACT_DIR,
+    GEOGRAPHY_COLUMN,
+    RATE_COLUMN,
+    ZIP_COLUMN,
+    publish_rate_artifact,
+)
+
+ZIP_CARRIER_COLUMNS = ["STATE", ZIP_COLUMN, "CARRIER", "LOCALITY"]
+
+MAC_COLUMN = "Medicare Administrative Contractor (MAC)"
+ADDENDUM_D_COLUMNS = [MAC_COLUMN, "State", "Locality Number", "Locality Name"]
+
+# Addendum D workbooks have three title rows above the header; the readers
+# find it on their own, this is only the default for forcing it
+ADDENDUM_D_HEADER_ROW = 3
+
+REPORT_COLUMNS = [
+    "run_id",
+    "start_date",
+    ZIP_COLUMN,
+    GEOGRAPHY_COLUMN,
+    RATE_COLUMN,
+    "match_source",
+]
+
+REPORT_FILE_NAME = "Look up Respite Rate"
+SCENARIOS_FILE_NAME = "Respite Rate Scenarios.csv"
+
+MATCH_PRIMARY = "State + MAC + Locality"
+MATCH_FALLBACK = "MAC + Locality"
+MATCH_NONE = "Unmatched"
+
+
+# ---------------------------
+# Reading source files
+# ---------------------------
+def is_gaf_column(name):
+    return "GAF" in str(name).upper()
+
+
+def read_zip_carrier(source, file_name=None, engine=None):
+    """Read the ZIP Code to Carrier Locality columns from a path, bytes or file object."""
+    return read_table(source, ZIP_CARRIER_COLUMNS, file_name, engine=engine)
+
+
+def read_addendum_d(source, file_name=None, engine=None, header=None):
+    """Read the Addendum D locality and GAF columns.
+
+    header=None finds the header row below the title rows; pass
+    ADDENDUM_D_HEADER_ROW (or another row number) to force it.
+    """
+    return read_table(
+        source,
+        ADDENDUM_D_COLUMNS,
+        file_name,
+        extra_columns=is_gaf_column,
+        header=header,
+        engine=engine
+    )
+
+
+def detect_gaf_columns(df2):
+    return [col for col in df2.columns if is_gaf_column(col)]
+
+
+# ---------------------------
+# Vectorized helpers
+# ---------------------------
+# ~43k ZIP rows share only a few hundred localities and ~100 distinct rates,
+# so values are factorized once and only the distinct values are converted.
+def normalize_locality(values):
+    # Same result as str(int(float(x))) per row, NaN for missing values
+    codes, uniques = pd.factorize(values)
+    labels = np.array([str(int(float(x))) for x in uniques] + [np.nan], dtype=object)
+    return pd.Series(labels[codes], index=values.index)
+
+
+def format_rates(rates):
+    # Same result as f"{x:.2f}" per row, "NA" for missing values
+    codes, uniques = pd.factorize(rates)
+    labels = np.array([f"{x:.2f}" for x in uniques] + ["NA"], dtype=object)
+    return pd.Series(labels[codes], index=rates.index)
+
+
+def prepare_sources(df1, df2, gaf_columns):
+    """Select the needed columns and normalize the merge keys."""
+    df1 = df1[ZIP_CARRIER_COLUMNS].copy()
+    df2 = df2[ADDENDUM_D_COLUMNS + list(gaf_columns)].copy()
+
+    df1["STATE"] = df1["STATE"].astype(str).str.strip().str.upper()
+    df2["State"] = df2["State"].astype(str).str.strip().str.upper()
+
+    df1["LOCALITY"] = normalize_locality(df1["LOCALITY"])
+    df2["Locality Number"] = normalize_locality(df2["Locality Number"])
+
+    df1["CARRIER"] = df1["CARRIER"].astype(str).str.zfill(5)
+    df2[MAC_COLUMN] = df2[MAC_COLUMN].astype(str).str.zfill(5)
+
+    return df1, df2
+
+
+# ---------------------------
+# GAF join engine
+# ---------------------------
+def build_locality_lookup(df2, key_columns):
+    # Row position in df2 for each key; the first row wins on duplicate keys
+    keyed = df2.drop_duplicates(key_columns)
+    return pd.Series(keyed.index.to_numpy(), index=pd.MultiIndex.from_frame(keyed[key_columns]))
+
+
+def lookup_rows(lookup, keys_df):
+    positions = lookup.index.get_indexer(pd.MultiIndex.from_frame(keys_df))
+    rows = np.full(len(keys_df), -1, dtype=np.int64)
+    rows[positions >= 0] = lookup.to_numpy()[positions[positions >= 0]]
+    return rows
+
+
+def resolve_locality_rows(df1, df2):
+    """Addendum D row positions for each ZIP row, for both join keys.
+
+    Returns (primary_rows, fallback_rows); -1 means no match. df2 must have
+    a default RangeIndex.
+    """
+    primary_lookup = build_locality_lookup(df2, ["State", MAC_COLUMN, "Locality Number"])
+    fallback_lookup = build_locality_lookup(df2, [MAC_COLUMN, "Locality Number"])
+
+    return (
+        lookup_rows(primary_lookup, df1[["STATE", "CARRIER", "LOCALITY"]]),
+        lookup_rows(fallback_lookup, df1[["CARRIER", "LOCALITY"]]),
+    )
+
+
+def _with_missing_row(df):
+    # A trailing all-NaN row lets -1 ("no match") be used as a plain index
+    return pd.concat(
+        [df, pd.DataFrame([[np.nan] * len(df.columns)], columns=df.columns)],
+        ignore_index=True
+    )
+
+
+def join_gaf(df1, df2, gaf_column, locality_rows=None):
+    """Resolve every ZIP row to an Addendum D row in one pass.
+
+    Tries (STATE, CARRIER, LOCALITY) first and falls back to
+    (CARRIER, LOCALITY) when that yields no GAF value. Returns df1 with
+    Locality Name, the GAF column and match_source added.
+    """
+    df2 = df2.reset_index(drop=True)
+    primary_rows, fallback_rows = locality_rows or resolve_locality_rows(df1, df2)
+
+    values = _with_missing_row(df2[["Locality Name", gaf_column]])
+    gaf_values = values[gaf_column].to_numpy()
+
+    primary_hit = pd.notna(gaf_values[primary_rows])
+    rows = np.where(primary_hit, primary_rows, fallback_rows)
+    fallback_hit = ~primary_hit & pd.notna(gaf_values[rows])
+
+    merged_df = df1.reset_index(drop=True).copy()
+    merged_df["Locality Name"] = values["Locality Name"].to_numpy()[rows]
+    merged_df[gaf_column] = gaf_values[rows]
+    merged_df["match_source"] = np.select(
+        [primary_hit, fallback_hit],
+        [MATCH_PRIMARY, MATCH_FALLBACK],
+        default=MATCH_NONE
+    )
+
+    return merged_df
+
+
+def match_stats(merged_df):
+    return {
+        "primary_matches": int((merged_df["match_source"] == MATCH_PRIMARY).sum()),
+        "fallback_matches": int((merged_df["match_source"] == MATCH_FALLBACK).sum()),
+        "unmatched": int((merged_df["match_source"] == MATCH_NONE).sum()),
+        "total": len(merged_df),
+    }
+
+
+# ---------------------------
+# Report
+# ---------------------------
+def new_run_id():
+    return int(datetime.now().strftime("%Y%m%d%H%M%S"))
+
+
+def clean_geography(locality_names):
+    # Addendum D marks some locality names with asterisks
+    return (
+        locality_names
+        .astype(str)
+        .str.replace(r"\*+", "", regex=True)
+        .str.strip()
+        .replace(["nan", "NaT", "None", "NAN"], "NA")
+        .fillna("NA")
+    )
+
+
+def compute_report(merged_df, gaf_column, base_rate, start_date, run_id):
+    """Build the final report table from a joined table."""
+    rates = (pd.to_numeric(merged_df[gaf_column], errors="coerce") * base_rate).round(2)
+
+    final_df = pd.DataFrame({
+        ZIP_COLUMN: merged_df[ZIP_COLUMN],
+        GEOGRAPHY_COLUMN: merged_df["Locality Name"],
+        RATE_COLUMN: format_rates(rates),
+        "match_source": merged_df["match_source"],
+    })
+
+    final_df[ZIP_COLUMN] = final_df[ZIP_COLUMN].astype(str).str.zfill(5)
+
+    final_df[GEOGRAPHY_COLUMN] = clean_geography(final_df[GEOGRAPHY_COLUMN])
+
+    final_df.replace(
+        to_replace=["nan", "NaT", "None", "NAN"],
+        value="NA",
+        inplace=True
+    )
+
+    final_df.fillna("NA", inplace=True)
+
+    # start_date and run_id are the same for every row in a report
+    final_df["start_date"] = start_date.strftime("%Y-%m-%d")
+    final_df["run_id"] = run_id
+
+    return final_df[REPORT_COLUMNS]
+
+
+def build_report(df1, df2, gaf_column, base_rate, start_date, run_id=None):
+    """Run the whole pipeline on parsed source frames.
+
+    Returns (final_df, stats) where stats holds the match counts.
+    """
+    df1, df2 = prepare_sources(df1, df2, [gaf_column])
+    merged_df = join_gaf(df1, df2, gaf_column)
+
+    final_df = compute_report(
+        merged_df,
+        gaf_column,
+        base_rate,
+        start_date,
+        run_id if run_id is not None else new_run_id()
+    )
+    return final_df, match_stats(merged_df)
+
+
+# ---------------------------
+# Rate scenarios
+# ---------------------------
+def gaf_matrix(df1, df2, gaf_columns, locality_rows=None):
+    """GAF value of every ZIP row for every GAF column, as an (n_zips, n_gaf) array.
+
+    Applies the same primary/fallback rule as join_gaf, column by column,
+    reusing one pair of key lookups for all columns.
+    """
+    df2 = df2.reset_index(drop=True)
+    primary_rows, fallback_rows = locality_rows or resolve_locality_rows(df1, df2)
+
+    raw = _with_missing_row(df2[list(gaf_columns)])
+    numeric = raw.apply(pd.to_numeric, errors="coerce").to_numpy(dtype=float)
+    present = raw.notna().to_numpy()
+
+    primary_hit = present[primary_rows]
+    return np.where(primary_hit, numeric[primary_rows], numeric[fallback_rows])
+
+
+def scenario_column(gaf_column, base_rate):
+    return f"{gaf_column} @ {base_rate:.2f}"
+
+
+def compute_scenarios(df1, df2, gaf_columns, base_rates, layout="wide"):
+    """Respite rates for every (GAF column, base rate) pair in one pass.
+
+    Expects frames from prepare_sources. The rates are one broadcast
+    multiply of the (zips, gaf) matrix by the base rates. layout="wide"
+    gives one column per scenario; layout="long" gives one row per
+    (ZIP, GAF column, base rate). Geography follows the first GAF column.
+    """
+    df2 = df2.reset_index(drop=True)
+    locality_rows = resolve_locality_rows(df1, df2)
+
+    gaf = gaf_matrix(df1, df2, gaf_columns, locality_rows)
+    base_rates = np.asarray(base_rates, dtype=float)
+    rates = np.round(gaf[:, :, None] * base_rates[None, None, :], 2)
+
+    merged_df = join_gaf(df1, df2, gaf_columns[0], locality_rows)
+    zips = merged_df[ZIP_COLUMN].astype(str).str.zfill(5).to_numpy()
+    geography = clean_geography(merged_df["Locality Name"]).to_numpy()
+
+    if layout == "long":
+        per_zip = len(gaf_columns) * len(base_rates)
+        return pd.DataFrame({
+            ZIP_COLUMN: np.repeat(zips, per_zip),
+            GEOGRAPHY_COLUMN: np.repeat(geography, per_zip),
+            "gaf_column": np.tile(np.repeat(np.asarray(gaf_columns, dtype=object), len(base_rates)), len(zips)),
+            "base_rate": np.tile(base_rates, len(zips) * len(gaf_columns)),
+            RATE_COLUMN: rates.reshape(-1),
+        })
+
+    columns = [
+        scenario_column(gaf_column, base_rate)
+        for gaf_column in gaf_columns
+        for base_rate in base_rates
+    ]
+    wide = pd.DataFrame(rates.reshape(len(zips), -1), columns=columns)
+    wide.insert(0, GEOGRAPHY_COLUMN, geography)
+    wide.insert(0, ZIP_COLUMN, zips)
+    return wide
+
+
+REPORT_SHEET_NAME = "Respite Rates"
+
+
+def report_csv_bytes(final_df):
+    # Preserve ZIP CODE as text in CSV so leading zeros are not lost
+    csv_df = final_df.assign(**{ZIP_COLUMN: '="' + final_df[ZIP_COLUMN].astype(str) + '"'})
+
+    return csv_df.to_csv(index=False).encode("utf-8")
+
+
+def report_xlsx_bytes(final_df):
+    """Write the report as xlsx, streaming rows in constant_memory mode.
+
+    Same workbook DataFrame.to_excel produced: plain header row, ZIP CODE
+    column formatted as text and run_id as a whole number.
+    """
+    output = io.BytesIO()
+
+    # constant_memory flushes each row to a temp file once the next row
+    # starts, so the workbook is never held in memory next to final_df
+    workbook = xlsxwriter.Workbook(output, {"constant_memory": True})
+    worksheet = workbook.add_worksheet(REPORT_SHEET_NAME)
+
+    zip_text_format = workbook.add_format({"num_format": "@"})
+    run_id_number_format = workbook.add_format({"num_format": "0"})
+
+    zip_col_idx = final_df.columns.get_loc(ZIP_COLUMN)
+    run_id_col_idx = final_df.columns.get_loc("run_id")
+
+    # Preserve ZIP CODE leading zeros
+    worksheet.set_column(zip_col_idx, zip_col_idx, 12, zip_text_format)
+
+    # Keep run_id numeric in Excel
+    worksheet.set_column(run_id_col_idx, run_id_col_idx, 18, run_id_number_format)
+
+    worksheet.write_row(0, 0, [str(col) for col in final_df.columns])
+    for row_number, row in enumerate(final_df.itertuples(index=False, name=None), start=1):
+        worksheet.write_row(row_number, 0, row)
+
+    workbook.close()
+    return output.getvalue()
+
+
+def publish_report(final_df, artifact_root=ARTIFACT_DIR, **meta):
+    """Publish a report for the lookup app, effective from its start_date.
+
+    Writes a rate index artifact (see respite_rate_index) plus the rate
+    table in the respite_rate_geography_*.csv layout, and returns its
+    directory. meta (e.g. gaf_column, base_rate) is kept in meta.json.
+    """
+    rate_table = final_df[[ZIP_COLUMN, GEOGRAPHY_COLUMN, RATE_COLUMN]]
+    return publish_rate_artifact(final_df, report_csv_bytes(rate_table), artifact_root, **meta)
+
+
+# ---------------------------
+# Command line
+# ---------------------------
+def _scenario_file_name(gaf_column, base_rate, single):
+    if single:
+        return f"{REPORT_FILE_NAME}.csv"
+
+    safe_gaf = "".join(c if c.isalnum() else "_" for c in str(gaf_column)).strip("_")
+    return f"{REPORT_FILE_NAME} - {safe_gaf} - {base_rate:.2f}.csv"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Generate GUIDE respite rate reports from CMS source files."
+    )
+    parser.add_argument("--zip-file", required=True, help="ZIP Code to Carrier Locality file (.xlsx or .csv)")
+    parser.add_argument("--addendum-d", required=True, help="Addendum D Geographic Adjustment Factors file (.xlsx or .csv)")
+    parser.add_argument(
+        "--gaf-column",
+        action="append",
+        help="GAF column to use; repeat for several (default: every column containing 'GAF')"
+    )
+    parser.add_argument(
+        "--base-rate",
+        action="append",
+        type=float,
+        required=True,
+        help="base hourly respite rate in $; repeat for several"
+    )
+    parser.add_argument("--start-date", type=date.fromisoformat, default=date.today(), help="YYYY-MM-DD (default: today)")
+    parser.add_argument(
+        "--addendum-d-header",
+        type=int,
+        help=f"0-based header row of the Addendum D file (default: auto-detect, usually {ADDENDUM_D_HEADER_ROW})"
+    )
+    parser.add_argument(
+        "--xlsx-engine",
+        choices=available_engines(),
+        help="xlsx reader (default: the fastest installed)"
+    )
+    parser.add_argument("--output-dir", default=".")
+    parser.add_argument(
+        "--scenarios",
+        choices=["wide", "long"],
+        help="write one scenario matrix CSV instead of one report per scenario"
+    )
+    parser.add_argument(
+        "--publish",
+        nargs="?",
+        const=ARTIFACT_DIR,
+        metavar="DIR",
+        help=f"also publish the report for the lookup app (default DIR: {ARTIFACT_DIR})"
+    )
+    args = parser.parse_args(argv)
+
+    if any(rate <= 0 for rate in args.base_rate):
+        parser.error("--base-rate must be greater than 0")
+
+    df1 = read_zip_carrier(args.zip_file, engine=args.xlsx_engine)
+    df2 = read_addendum_d(args.addendum_d, engine=args.xlsx_engine, header=args.addendum_d_header)
+
+    gaf_columns = args.gaf_column or detect_gaf_columns(df2)
+    if not gaf_columns:
+        parser.error("no column containing 'GAF' was found in the Addendum D file")
+
+    if args.publish and (args.scenarios or len(gaf_columns) * len(args.base_rate) > 1):
+        parser.error("--publish needs a single GAF column and base rate")
+
+    # Parse and normalize once; join once per GAF column; one CSV per scenario
+    df1, df2 = prepare_sources(df1, df2, gaf_columns)
+    run_id = new_run_id()
+    single = len(gaf_columns) * len(args.base_rate) == 1
+
+    os.makedirs(args.output_dir, exist_ok=True)
+
+    if args.scenarios:
+        scenarios_df = compute_scenarios(df1, df2, gaf_columns, args.base_rate, layout=args.scenarios)
+        path = os.path.join(args.output_dir, SCENARIOS_FILE_NAME)
+        scenarios_df.to_csv(path, index=False, float_format="%.2f")
+
+        print(f"{path}: {len(df1):,} ZIPs x {len(gaf_columns)} GAF columns x {len(args.base_rate)} base rates")
+        return 0
+
+    for gaf_column in gaf_columns:
+        merged_df = join_gaf(df1, df2, gaf_column)
+        stats = match_stats(merged_df)
+
+        for base_rate in args.base_rate:
+            final_df = compute_report(merged_df, gaf_column, base_rate, args.start_date, run_id)
+            path = os.path.join(args.output_dir, _scenario_file_name(gaf_column, base_rate, single))
+
+            with open(path, "wb") as f:
+                f.write(report_csv_bytes(final_df))
+
+            if args.publish:
+                artifact_dir = publish_report(final_df, args.publish, gaf_column=gaf_column, base_rate=base_rate)
+                print(f"published {artifact_dir}")
+
+            print(
+                f"{path}: {stats['total']:,} ZIPs, "
+                f"{stats['primary_matches']:,} primary, "
+                f"{stats['fallback_matches']:,} fallback, "
+                f"{stats['unmatched']:,} unmatched"
+            )
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
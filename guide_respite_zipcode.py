@@ -1,10 +1,116 @@
 import streamlit as st
 import pandas as pd
-import io
-from datetime import date, datetime
+import hashlib
+import os
+import tempfile
+from datetime import date
+from functools import partial
+
+from app_metrics import RunMetrics, render_debug_panel
+
+from cms_source_readers import READER_VERSION
+from guide_respite_engine import (
+    REPORT_FILE_NAME,
+    REPORT_SHEET_NAME,
+    SCENARIOS_FILE_NAME,
+    build_report,
+    compute_scenarios,
+    detect_gaf_columns,
+    prepare_sources,
+    publish_report,
+    read_addendum_d,
+    read_zip_carrier,
+    report_csv_bytes,
+    report_xlsx_bytes,
+)
+from gsheet_sync import authorize, publish_to_sheet
+from respite_rate_diff import (
+    CHANGE_ADDED,
+    CHANGE_BOTH,
+    CHANGE_GEOGRAPHY,
+    CHANGE_RATE,
+    CHANGE_REMOVED,
+    SUMMARY_COUNTS,
+    changes_csv_bytes,
+    diff_tables,
+)
+from respite_rate_store import get_period, load_period_index, rate_periods
+
+
+# ---------------------------
+# Parsed source file cache
+# ---------------------------
+# Only the needed columns are read (see cms_source_readers), and the parsed
+# DataFrames are cached by the uploaded bytes' digest. When pyarrow is
+# installed they are also kept as Parquet on disk, which survives app
+# restarts. The reader version is part of the key, and only the most
+# recently used files are kept.
+PARSED_CACHE_DIR = os.path.join(tempfile.gettempdir(), "guide_respite_cache")
+PARSED_CACHE_ENTRIES = 16
+
+SOURCE_READERS = {
+    "zip_carrier": read_zip_carrier,
+    "addendum_d": read_addendum_d,
+}
+
+
+def uploaded_digest(uploaded_file):
+    return hashlib.sha256(uploaded_file.getvalue()).hexdigest()
+
+
+def prune_parsed_cache():
+    entries = [
+        os.path.join(PARSED_CACHE_DIR, name)
+        for name in os.listdir(PARSED_CACHE_DIR)
+        if not name.startswith(".")
+    ]
+    entries.sort(key=os.path.getmtime, reverse=True)
+
+    for path in entries[PARSED_CACHE_ENTRIES:]:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+@st.cache_data(max_entries=8, show_spinner="Reading uploaded file...")
+def read_source_file(digest, file_name, _data, kind):
+    parquet_path = os.path.join(PARSED_CACHE_DIR, f"{digest}-{kind}-v{READER_VERSION}.parquet")
+
+    try:
+        df = pd.read_parquet(parquet_path)
+        os.utime(parquet_path)
+        return df
+    except Exception:
+        pass
+
+    df = SOURCE_READERS[kind](_data, file_name)
+
+    # Best effort only: needs pyarrow and string column names
+    try:
+        os.makedirs(PARSED_CACHE_DIR, exist_ok=True)
+        df.to_parquet(parquet_path, index=False)
+        prune_parsed_cache()
+    except Exception:
+        pass
+
+    return df
+
+
+def read_uploaded_file(uploaded_file, kind):
+    with metrics.stage(f"read_{kind}", file_bytes=uploaded_file.size):
+        return read_source_file(
+            uploaded_digest(uploaded_file),
+            uploaded_file.name,
+            uploaded_file.getvalue(),
+            kind
+        )
+
 
 # 🔽 Add your image here (local file or URL)
 st.image("PocketRN_Logo.png", width=120)
+
+metrics = RunMetrics("guide_respite_zipcode")
 st.title("PocketRN GUIDE Model Respite Rates By Geography")
 
 st.markdown("Please follow the below instructions for generating updated table of **GUIDE Respite Rates by Zip Code**")
@@ -72,19 +178,13 @@ else:
 # ---------------------------
 base_rate = None
 selected_gaf_column = None
+gaf_columns = []
 
 if file1 and file2 is not None:
     try:
-        preview_df2 = (
-            pd.read_excel(file2, header=3)
-            if file2.name.lower().endswith("xlsx")
-            else pd.read_csv(file2, encoding="latin1")
-        )
+        preview_df2 = read_uploaded_file(file2, "addendum_d")
 
-        gaf_columns = [
-            col for col in preview_df2.columns
-            if "GAF" in str(col).upper()
-        ]
+        gaf_columns = detect_gaf_columns(preview_df2)
 
         if gaf_columns:
             selected_gaf_column = st.selectbox(
@@ -114,174 +214,27 @@ if file1 and file2 is not None:
 if file1 and file2 is not None and selected_gaf_column and base_rate and base_rate > 0:
     if st.button("🚀 Generate Report"):
         try:
-            df1 = (
-                pd.read_excel(file1)
-                if file1.name.lower().endswith("xlsx")
-                else pd.read_csv(file1, encoding="latin1")
-            )
-
-            df2 = (
-                pd.read_excel(file2, header=3)
-                if file2.name.lower().endswith("xlsx")
-                else pd.read_csv(file2, encoding="latin1")
-            )
-
-            # Select relevant columns
-            df1 = df1[["STATE", "ZIP CODE", "CARRIER", "LOCALITY"]]
-
-            df2 = df2[[
-                "Medicare Administrative Contractor (MAC)",
-                "State",
-                "Locality Number",
-                "Locality Name",
-                selected_gaf_column
-            ]]
-
-            # ---------------------------
-            # Normalize merge keys safely
-            # ---------------------------
-            df1["STATE"] = df1["STATE"].astype(str).str.strip().str.upper()
-            df2["State"] = df2["State"].astype(str).str.strip().str.upper()
-
-            df1["LOCALITY"] = df1["LOCALITY"].apply(
-                lambda x: str(int(float(x))) if pd.notna(x) else None
-            )
-
-            df2["Locality Number"] = df2["Locality Number"].apply(
-                lambda x: str(int(float(x))) if pd.notna(x) else None
-            )
-
-            df1["CARRIER"] = df1["CARRIER"].astype(str).str.zfill(5)
-
-            df2["Medicare Administrative Contractor (MAC)"] = (
-                df2["Medicare Administrative Contractor (MAC)"]
-                .astype(str)
-                .str.zfill(5)
-            )
-
-            # ---------------------------
-            # Primary merge: STATE + CARRIER + LOCALITY
-            # ---------------------------
-            merged_df = pd.merge(
-                df1,
-                df2,
-                how="left",
-                left_on=["STATE", "CARRIER", "LOCALITY"],
-                right_on=[
-                    "State",
-                    "Medicare Administrative Contractor (MAC)",
-                    "Locality Number"
-                ]
-            )
-
-            primary_matches = merged_df[selected_gaf_column].notna().sum()
-
-            # ---------------------------
-            # Fallback merge: MAC + LOCALITY
-            # ---------------------------
-            missing_mask = merged_df[selected_gaf_column].isna()
-
-            if missing_mask.any():
-                missing_df1 = df1.loc[
-                    missing_mask,
-                    ["STATE", "ZIP CODE", "CARRIER", "LOCALITY"]
-                ].copy()
-
-                secondary_merge = pd.merge(
-                    missing_df1,
+            # Both files come from the parsed-file cache, so regenerating
+            # with another base rate or GAF column skips the parsing
+            df1 = read_uploaded_file(file1, "zip_carrier")
+            df2 = read_uploaded_file(file2, "addendum_d")
+
+            # Join, rate computation and formatting live in guide_respite_engine
+            with metrics.stage("build_report", rows=len(df1), gaf_column=selected_gaf_column):
+                final_df, stats = build_report(
+                    df1,
                     df2,
-                    how="left",
-                    left_on=["CARRIER", "LOCALITY"],
-                    right_on=[
-                        "Medicare Administrative Contractor (MAC)",
-                        "Locality Number"
-                    ]
-                )
-
-                secondary_matches = secondary_merge[selected_gaf_column].notna().sum()
-
-                merged_df.loc[missing_mask, selected_gaf_column] = (
-                    secondary_merge[selected_gaf_column].values
-                )
-
-                merged_df.loc[missing_mask, "Locality Name"] = (
-                    secondary_merge["Locality Name"].values
+                    selected_gaf_column,
+                    base_rate,
+                    start_date
                 )
 
-            else:
-                secondary_matches = 0
-
-            # ---------------------------
-            # Compute Respite Rates
-            # ---------------------------
-            merged_df["Respite Reimbursement Rate ($/hr)"] = (
-                pd.to_numeric(
-                    merged_df[selected_gaf_column],
-                    errors="coerce"
-                ) * base_rate
-            ).round(2)
-
-            merged_df["Respite Reimbursement Rate ($/hr)"] = merged_df[
-                "Respite Reimbursement Rate ($/hr)"
-            ].map(lambda x: f"{x:.2f}" if pd.notna(x) else "NA")
-
-            # ---------------------------
-            # Prepare Final Output
-            # ---------------------------
-            final_df = merged_df[[
-                "ZIP CODE",
-                "Locality Name",
-                "Respite Reimbursement Rate ($/hr)"
-            ]].copy()
-
-            final_df.rename(columns={"Locality Name": "Geography"}, inplace=True)
-
-            final_df["ZIP CODE"] = (
-                final_df["ZIP CODE"]
-                .astype(str)
-                .str.zfill(5)
-            )
-
-            final_df["Geography"] = (
-                final_df["Geography"]
-                .astype(str)
-                .str.replace(r"\*+", "", regex=True)
-                .str.strip()
-            )
-
-            final_df.replace(
-                to_replace=["nan", "NaT", "None", "NAN"],
-                value="NA",
-                inplace=True
-            )
-
-            final_df.fillna("NA", inplace=True)
-
-            # ---------------------------
-            # Backend Generated Columns
-            # ---------------------------
-
-            # start_date is selected once from UI and applied to every row
-            final_df["start_date"] = start_date.strftime("%Y-%m-%d")
-
-            # run_id is generated in backend only
-            # Same numeric run_id is applied to all rows in this report
-            final_df["run_id"] = int(datetime.now().strftime("%Y%m%d%H%M%S"))
-
-            # Keep run_id and start_date as first columns
-            final_df = final_df[[
-                "run_id",
-                "start_date",
-                "ZIP CODE",
-                "Geography",
-                "Respite Reimbursement Rate ($/hr)"
-            ]]
-
             # ---------------------------
             # Summary + Output
             # ---------------------------
-            st.info(f"✅ Primary matches: {primary_matches:,}")
-            st.info(f"🔁 Fallback (MAC + Locality) recovered: {secondary_matches:,}")
+            st.info(f"✅ Primary matches: {stats['primary_matches']:,}")
+            st.info(f"🔁 Fallback (MAC + Locality) recovered: {stats['fallback_matches']:,}")
+            st.info(f"❔ Unmatched ZIPs: {stats['unmatched']:,}")
             st.info(f"📄 Total ZIPs processed: {len(final_df):,}")
             st.info(f"📌 GAF column used: {selected_gaf_column}")
 
@@ -289,6 +242,11 @@ if file1 and file2 is not None and selected_gaf_column and base_rate and base_ra
             st.dataframe(final_df)
 
             st.session_state["final_df"] = final_df
+            st.session_state["report_exports"] = {}
+            st.session_state["report_meta"] = {
+                "gaf_column": selected_gaf_column,
+                "base_rate": base_rate,
+            }
 
             st.success("✅ Report generated! Download options appear below.")
 
@@ -296,52 +254,196 @@ if file1 and file2 is not None and selected_gaf_column and base_rate and base_ra
             st.error(f"❌ Error during processing: {e}")
 
 # ---------------------------
-# Download Buttons
+# Rate Scenarios
 # ---------------------------
-if "final_df" in st.session_state:
-    final_df = st.session_state["final_df"]
+if file1 and file2 is not None and gaf_columns:
+    with st.expander("🧮 Compare rate scenarios (all GAF columns × several base rates)"):
+        scenario_rates_text = st.text_input(
+            "Base hourly respite rates to compare ($, comma-separated)",
+            placeholder="30.00, 32.17, 35.00"
+        )
 
-    # CSV export
-    csv_df = final_df.copy()
+        if st.button("Compute Scenarios"):
+            try:
+                scenario_rates = [
+                    float(value) for value in scenario_rates_text.replace(";", ",").split(",")
+                    if value.strip()
+                ]
 
-    # Preserve ZIP CODE as text in CSV so leading zeros are not lost
-    csv_df["ZIP CODE"] = csv_df["ZIP CODE"].apply(lambda x: f'="{x}"')
+                if not scenario_rates or min(scenario_rates) <= 0:
+                    st.warning("⚠️ Please enter one or more base rates greater than 0.")
+                else:
+                    df1, df2 = prepare_sources(
+                        read_uploaded_file(file1, "zip_carrier"),
+                        read_uploaded_file(file2, "addendum_d"),
+                        gaf_columns
+                    )
 
-    csv_data = csv_df.to_csv(index=False).encode("utf-8")
+                    # One join, then a single broadcast over every scenario
+                    with metrics.stage("compute_scenarios", rows=len(df1), scenarios=len(gaf_columns) * len(scenario_rates)):
+                        scenarios_df = compute_scenarios(df1, df2, gaf_columns, scenario_rates)
 
-    st.download_button(
-        "⬇️ Download CSV (.csv)",
-        data=csv_data,
-        file_name="Look up Respite Rate.csv",
-        mime="text/csv"
-    )
+                    st.dataframe(scenarios_df)
+
+                    st.download_button(
+                        "⬇️ Download Scenarios (.csv)",
+                        data=scenarios_df.to_csv(index=False, float_format="%.2f").encode("utf-8"),
+                        file_name=SCENARIOS_FILE_NAME,
+                        mime="text/csv"
+                    )
+
+            except Exception as e:
+                st.error(f"❌ Error computing scenarios: {e}")
+
+# ---------------------------
+# Compare with deployed rates
+# ---------------------------
+# Which ZIPs a new report adds, drops or re-rates against a period the
+# lookup app already serves (see respite_rate_diff)
+if "final_df" in st.session_state:
+    with st.expander("🔍 Compare with deployed rates"):
+        final_df = st.session_state["final_df"]
+        report_start = date.fromisoformat(final_df["start_date"].iloc[0])
+
+        deployed_periods = rate_periods()
+        earlier = [i for i, period in enumerate(deployed_periods) if period.start < report_start]
+        compare_label = st.selectbox(
+            "Deployed period",
+            [period.label for period in deployed_periods],
+            index=earlier[-1] if earlier else len(deployed_periods) - 1
+        )
 
-    # Excel export
-    xlsx_output = io.BytesIO()
+        if st.button("Compare"):
+            try:
+                compare_period = get_period(compare_label, deployed_periods)
+                deployed_index = load_period_index(compare_period)
+
+                if deployed_index is None:
+                    st.warning(f"⚠️ {compare_period.filename} is not deployed.")
+                else:
+                    with metrics.stage("rate_diff", rows=len(final_df)):
+                        diff = diff_tables(deployed_index, final_df)
+
+                    counts = diff.counts
+                    st.info(f"📄 ZIPs: {counts['old_zips']:,} deployed, {counts['new_zips']:,} in this report, {counts['unchanged']:,} unchanged")
+                    st.info(
+                        f"➕ Added: {counts[CHANGE_ADDED]:,} | ➖ Removed: {counts[CHANGE_REMOVED]:,} | "
+                        f"🗺️ Geography changed: {counts[CHANGE_GEOGRAPHY] + counts[CHANGE_BOTH]:,} | "
+                        f"💲 Rate changed: {counts[CHANGE_RATE] + counts[CHANGE_BOTH]:,}"
+                    )
+
+                    st.markdown("#### Changes by geography")
+                    st.dataframe(diff.summary[diff.summary[SUMMARY_COUNTS].sum(axis=1) > 0])
+
+                    st.markdown("#### Changed ZIPs")
+                    st.dataframe(diff.changes)
+
+                    st.download_button(
+                        "⬇️ Download Changes (.csv)",
+                        data=changes_csv_bytes(diff.changes),
+                        file_name=f"Respite Rate Changes - {compare_period.start} to {report_start}.csv",
+                        mime="text/csv"
+                    )
+
+            except Exception as e:
+                st.error(f"❌ Error comparing rates: {e}")
 
-    with pd.ExcelWriter(xlsx_output, engine="xlsxwriter") as writer:
-        final_df.to_excel(writer, index=False, sheet_name="Respite Rates")
+# ---------------------------
+# Download Buttons
+# ---------------------------
+# Exports are built only when a button is clicked, at most once per report
+# run_id, so widget reruns after generating a report stay fast
+REPORT_EXPORTS = {
+    "csv": report_csv_bytes,
+    "xlsx": report_xlsx_bytes,
+}
 
-        workbook = writer.book
-        worksheet = writer.sheets["Respite Rates"]
 
-        zip_text_format = workbook.add_format({"num_format": "@"})
-        run_id_number_format = workbook.add_format({"num_format": "0"})
+def report_sheet_url():
+    try:
+        if "gcp_service_account" not in st.secrets:
+            return None
+        return st.secrets.get("config", {}).get("report_sheet_url")
+    except FileNotFoundError:  # no secrets.toml
+        return None
+
 
-        zip_col_idx = final_df.columns.get_loc("ZIP CODE")
-        run_id_col_idx = final_df.columns.get_loc("run_id")
+@st.cache_resource
+def get_gsheet_client():
+    return authorize(st.secrets["gcp_service_account"])
 
-        # Preserve ZIP CODE leading zeros
-        worksheet.set_column(zip_col_idx, zip_col_idx, 12, zip_text_format)
 
-        # Keep run_id numeric in Excel
-        worksheet.set_column(run_id_col_idx, run_id_col_idx, 18, run_id_number_format)
+def report_export(exports, final_df, kind, metrics):
+    key = (int(final_df["run_id"].iloc[0]), kind)
+    if key not in exports:
+        # Runs on download, after the script run; still logged under its run
+        with metrics.stage(f"export_{kind}", rows=len(final_df)):
+            exports[key] = REPORT_EXPORTS[kind](final_df)
+    return exports[key]
 
-    xlsx_data = xlsx_output.getvalue()
 
+if "final_df" in st.session_state:
+    final_df = st.session_state["final_df"]
+    exports = st.session_state.setdefault("report_exports", {})
+
+    # CSV export (ZIP CODE written as ="01234" so leading zeros survive)
+    st.download_button(
+        "⬇️ Download CSV (.csv)",
+        data=partial(report_export, exports, final_df, "csv", metrics),
+        file_name=f"{REPORT_FILE_NAME}.csv",
+        mime="text/csv"
+    )
+
+    # Excel export (ZIP CODE as text, run_id as a number)
     st.download_button(
         "⬇️ Download Excel (.xlsx)",
-        data=xlsx_data,
-        file_name="Look up Respite Rate.xlsx",
+        data=partial(report_export, exports, final_df, "xlsx", metrics),
+        file_name=f"{REPORT_FILE_NAME}.xlsx",
         mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
     )
+
+    # Publishing writes a typed rate artifact the lookup app loads by
+    # effective date, instead of hand-renaming the CSV download
+    if st.button("📤 Publish to Respite Rate Lookup"):
+        try:
+            with metrics.stage("publish", rows=len(final_df)):
+                artifact_dir = publish_report(final_df, **st.session_state.get("report_meta", {}))
+            st.success(
+                f"✅ Published to {artifact_dir}, effective {final_df['start_date'].iloc[0]}. "
+                "The Respite Rate Lookup app loads it on its next page view."
+            )
+        except Exception as e:
+            st.error(f"❌ Error publishing report: {e}")
+
+    # Google Sheets publishing needs the service account and a
+    # [config] report_sheet_url in st.secrets; without them it is hidden
+    sheet_url = report_sheet_url()
+    if sheet_url:
+        sheet_tab = st.text_input(
+            "Google Sheet tab",
+            value=f"{REPORT_SHEET_NAME} {final_df['start_date'].iloc[0]}"
+        )
+
+        if st.button("📄 Publish to Google Sheet"):
+            progress_bar = st.progress(0.0, text="Writing rows to the sheet...")
+            status = st.empty()
+
+            def show_progress(done, total):
+                progress_bar.progress(done / max(total, 1), text=f"{done:,} of {total:,} rows written")
+
+            def show_retry(error, delay):
+                status.warning(f"Sheets API busy ({error.code}); retrying in {delay:.0f}s...")
+
+            try:
+                with metrics.stage("publish_sheet", rows=len(final_df)) as record:
+                    spreadsheet = get_gsheet_client().open_by_url(sheet_url)
+                    _, record["requests"] = publish_to_sheet(
+                        spreadsheet, sheet_tab, final_df,
+                        progress=show_progress, on_retry=show_retry
+                    )
+                status.empty()
+                st.success(f"✅ Wrote {len(final_df):,} rows to the '{sheet_tab}' tab in {record['requests']} requests.")
+            except Exception as e:
+                st.error(f"❌ Error publishing to Google Sheets: {e}")
+
+render_debug_panel(metrics)
@@ -0,0 +1,223 @@
+import argparse
+import os
+import time
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from respite_rate_index import GEOGRAPHY_COLUMN, ZIP_COLUMN, RateIndex, load_rate_index
+from respite_rate_snapshots import load_snapshot_index
+
+# -----------------------------------------
+# Period-to-period rate diff
+# -----------------------------------------
+# Both tables are loaded as RateIndexes, whose ZIPs are sorted and unique,
+# so aligning them is one searchsorted of the old ZIPs into the new ones.
+# Geographies are compared as codes (the old table's codes translated to
+# the new table's) and rates in whole cents, so a 43k-row diff takes a few
+# milliseconds once both tables are loaded.
+
+CHANGE_ADDED = "added"
+CHANGE_REMOVED = "removed"
+CHANGE_GEOGRAPHY = "geography"
+CHANGE_RATE = "rate"
+CHANGE_BOTH = "geography + rate"
+
+CHANGE_COLUMNS = [
+    ZIP_COLUMN,
+    "Change",
+    "Old Geography",
+    "New Geography",
+    "Old Rate",
+    "New Rate",
+    "Rate Change",
+]
+
+SUMMARY_COUNTS = [CHANGE_ADDED, CHANGE_REMOVED, CHANGE_GEOGRAPHY, CHANGE_RATE, CHANGE_BOTH]
+
+RateDiff = namedtuple("RateDiff", ["changes", "summary", "counts"])
+
+
+def load_table(source):
+    """RateIndex from a RateIndex, a report DataFrame, an index or artifact
+    directory, or a rate CSV (from the snapshot store if not on disk)."""
+    if isinstance(source, RateIndex):
+        return source
+    if isinstance(source, pd.DataFrame):
+        return RateIndex.from_frame(source)
+    if os.path.isdir(source):
+        return RateIndex.load(source)
+    if os.path.exists(source):
+        return load_rate_index(source)
+
+    index = load_snapshot_index(source)
+    if index is None:
+        raise FileNotFoundError(f"No rate table found for {source}")
+    return index
+
+
+def _cents(rates):
+    # NaN (an "NA" rate) compares equal to NaN
+    return np.where(np.isnan(rates), -1, np.round(rates * 100)).astype(np.int64)
+
+
+def _rates(index, positions):
+    return index.rates[index.rate_codes[positions]]
+
+
+def _geography_rates(index, to_union, n_union):
+    # Most common rate per geography, which is the geography's rate; NaN
+    # for geographies the table does not have
+    pairs = index.geography_codes.astype(np.int64) * len(index.rates) + index.rate_codes
+    counts = np.bincount(pairs, minlength=len(index.geographies) * len(index.rates))
+    counts = counts.reshape(len(index.geographies), len(index.rates))
+    present = counts.max(axis=1) > 0
+
+    rates = np.full(n_union, np.nan)
+    rates[to_union[present]] = index.rates[counts.argmax(axis=1)[present]]
+    return rates
+
+
+def diff_tables(old, new):
+    """Compare two rate tables on ZIP.
+
+    Returns a RateDiff of:
+      changes  one row per added, removed or changed ZIP, in ZIP order
+      summary  per geography: ZIPs before and after, the geography's rate
+               before and after, and how many ZIPs had each kind of change
+      counts   totals, as a dict
+    """
+    old, new = load_table(old), load_table(new)
+
+    # Sorted join: where each old ZIP would sit in the new ZIPs
+    pos = np.searchsorted(new.zips, old.zips)
+    if len(new.zips):
+        in_new = new.zips[np.minimum(pos, len(new.zips) - 1)] == old.zips
+    else:
+        in_new = np.zeros(len(old.zips), dtype=bool)
+
+    old_common = np.flatnonzero(in_new)
+    new_common = pos[in_new]
+    removed = np.flatnonzero(~in_new)
+    added_mask = np.ones(len(new.zips), dtype=bool)
+    added_mask[new_common] = False
+    added = np.flatnonzero(added_mask)
+
+    # Both tables' geography codes in one sorted union of names
+    geographies = sorted(set(old.geographies) | set(new.geographies))
+    union_pos = {g: i for i, g in enumerate(geographies)}
+    old_union = np.array([union_pos[g] for g in old.geographies], dtype=np.int64)
+    new_union = np.array([union_pos[g] for g in new.geographies], dtype=np.int64)
+
+    old_geography = old_union[old.geography_codes]
+    new_geography = new_union[new.geography_codes]
+
+    geography_changed = old_geography[old_common] != new_geography[new_common]
+    rate_changed = _cents(_rates(old, old_common)) != _cents(_rates(new, new_common))
+    changed = geography_changed | rate_changed
+    old_changed, new_changed = old_common[changed], new_common[changed]
+
+    # Changes as codes into SUMMARY_COUNTS until the frame is built
+    kind = np.select(
+        [~rate_changed[changed], ~geography_changed[changed]],
+        [SUMMARY_COUNTS.index(CHANGE_GEOGRAPHY), SUMMARY_COUNTS.index(CHANGE_RATE)],
+        SUMMARY_COUNTS.index(CHANGE_BOTH),
+    )
+    kind = np.concatenate([
+        kind,
+        np.full(len(added), SUMMARY_COUNTS.index(CHANGE_ADDED)),
+        np.full(len(removed), SUMMARY_COUNTS.index(CHANGE_REMOVED)),
+    ])
+
+    none = np.full(len(added) + len(removed), -1)
+    old_codes = np.concatenate([old_geography[old_changed], none[: len(added)], old_geography[removed]])
+    new_codes = np.concatenate([new_geography[new_changed], new_geography[added], none[len(added):]])
+
+    nan = np.full(len(added) + len(removed), np.nan)
+    old_rate = np.concatenate([_rates(old, old_changed), nan[: len(added)], _rates(old, removed)])
+    new_rate = np.concatenate([_rates(new, new_changed), _rates(new, added), nan[len(added):]])
+
+    zips = np.concatenate([old.zips[old_changed], new.zips[added], old.zips[removed]])
+    order = np.argsort(zips, kind="stable")
+    names = np.asarray(geographies + [None], dtype=object)
+
+    changes = pd.DataFrame({
+        ZIP_COLUMN: np.char.zfill(zips[order].astype(str), 5).astype(object),
+        "Change": np.asarray(SUMMARY_COUNTS, dtype=object)[kind[order]],
+        "Old Geography": names[old_codes[order]],
+        "New Geography": names[new_codes[order]],
+        "Old Rate": old_rate[order],
+        "New Rate": new_rate[order],
+        "Rate Change": np.round(new_rate[order] - old_rate[order], 2),
+    }, columns=CHANGE_COLUMNS)
+
+    # A ZIP that moved counts under its new geography; removed ZIPs under
+    # the geography they left
+    summary_geography = np.where(new_codes >= 0, new_codes, old_codes)
+    by_change = np.bincount(
+        summary_geography * len(SUMMARY_COUNTS) + kind,
+        minlength=len(geographies) * len(SUMMARY_COUNTS),
+    ).reshape(len(geographies), len(SUMMARY_COUNTS))
+
+    old_rates = _geography_rates(old, old_union, len(geographies))
+    new_rates = _geography_rates(new, new_union, len(geographies))
+
+    summary = pd.DataFrame({
+        GEOGRAPHY_COLUMN: geographies,
+        "ZIPs Before": np.bincount(old_geography, minlength=len(geographies)),
+        "ZIPs After": np.bincount(new_geography, minlength=len(geographies)),
+        "Old Rate": old_rates,
+        "New Rate": new_rates,
+        "Rate Change": np.round(new_rates - old_rates, 2),
+        **{name: by_change[:, i] for i, name in enumerate(SUMMARY_COUNTS)},
+    })
+
+    counts = {
+        "old_zips": len(old.zips),
+        "new_zips": len(new.zips),
+        "unchanged": len(old_common) - len(old_changed),
+        **{name: int(total) for name, total in zip(SUMMARY_COUNTS, by_change.sum(axis=0))},
+    }
+    return RateDiff(changes, summary, counts)
+
+
+def changes_csv_bytes(changes):
+    # ZIP CODE as ="01234", like the rate CSVs, so Excel keeps leading zeros
+    csv_df = changes.assign(**{ZIP_COLUMN: '="' + changes[ZIP_COLUMN] + '"'})
+    return csv_df.to_csv(index=False).encode("utf-8")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Compare two respite rate tables by ZIP: added, removed and changed ZIPs."
+    )
+    parser.add_argument("old", help="rate CSV (e.g. respite_rate_geography_2026_feb.csv) or index/artifact directory")
+    parser.add_argument("new", help="rate CSV or index/artifact directory")
+    parser.add_argument("--changes", help="write every added, removed or changed ZIP to this CSV")
+    parser.add_argument("--summary", help="write the per-geography summary to this CSV")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    diff = diff_tables(args.old, args.new)
+    seconds = time.perf_counter() - start
+
+    counts = diff.counts
+    print(f"{args.old} -> {args.new} ({seconds:.3f}s)")
+    print(f"ZIPs: {counts['old_zips']:,} -> {counts['new_zips']:,}, {counts['unchanged']:,} unchanged")
+    print(", ".join(f"{name}: {counts[name]:,}" for name in SUMMARY_COUNTS))
+
+    if args.changes:
+        with open(args.changes, "wb") as f:
+            f.write(changes_csv_bytes(diff.changes))
+    if args.summary:
+        diff.summary.to_csv(args.summary, index=False)
+
+    touched = diff.summary[diff.summary[SUMMARY_COUNTS].sum(axis=1) > 0]
+    if len(touched):
+        print()
+        print(touched.to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,308 @@
+import glob
+import hashlib
+import json
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+# -----------------------------------------
+# Compiled ZIP -> geography/rate index
+# -----------------------------------------
+# Each respite_rate_geography_*.csv is compiled once into a small directory
+# of .npy arrays that can be memory-mapped:
+#
+#   zips.npy             sorted uint32 ZIP codes
+#   geography_codes.npy  per-ZIP code into the geography table
+#   rate_codes.npy       per-ZIP code into the rate table
+#   meta.json            geography/rate tables + sha256 of the source CSV
+#
+# There are only ~110 geographies and ~90 distinct rates, so both code
+# arrays fit in uint8 and a lookup is a binary search over the ZIP array.
+
+ZIP_COLUMN = "ZIP CODE"
+GEOGRAPHY_COLUMN = "Geography"
+RATE_COLUMN = "Respite Reimbursement Rate ($/hr)"
+
+INDEX_DIR = "rate_index"
+INDEX_FORMAT_VERSION = 1
+
+_ARRAY_FILES = ("zips", "geography_codes", "rate_codes")
+
+
+def _code_dtype(size):
+    return np.uint8 if size <= np.iinfo(np.uint8).max + 1 else np.uint16
+
+
+def _file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _atomic_write(path, write):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        write(f)
+    os.replace(tmp_path, path)
+
+
+class RateIndex:
+    def __init__(self, zips, geography_codes, rate_codes, geographies, rates, meta=None):
+        self.zips = zips
+        self.geography_codes = geography_codes
+        self.rate_codes = rate_codes
+        self.geographies = list(geographies)
+        self.rates = np.asarray(rates, dtype=np.float64)
+        self.meta = dict(meta or {})
+
+    def __len__(self):
+        return len(self.zips)
+
+    # ---------------------------
+    # Builders
+    # ---------------------------
+    @classmethod
+    def from_frame(cls, df, meta=None):
+        zips = pd.to_numeric(
+            df[ZIP_COLUMN].astype(str).str.extract(r"(\d+)")[0],
+            errors="coerce"
+        )
+        keep = zips.notna().to_numpy()
+
+        zips = zips[keep].astype(np.uint32).to_numpy()
+        geography = df[GEOGRAPHY_COLUMN][keep].fillna("NA").astype(str).str.strip()
+        rate = pd.to_numeric(df[RATE_COLUMN][keep], errors="coerce")
+
+        geography_codes, geographies = pd.factorize(geography, sort=True)
+        rate_codes, rates = pd.factorize(rate, sort=True, use_na_sentinel=False)
+
+        # First row wins when a ZIP is listed twice, matching the old
+        # df[df["ZIP CODE"] == zip].iloc[0] behaviour
+        order = np.argsort(zips, kind="stable")
+        zips = zips[order]
+        first = np.ones(len(zips), dtype=bool)
+        first[1:] = zips[1:] != zips[:-1]
+        order = order[first]
+
+        return cls(
+            zips[first],
+            geography_codes[order].astype(_code_dtype(len(geographies))),
+            rate_codes[order].astype(_code_dtype(len(rates))),
+            geographies,
+            rates,
+            meta=meta,
+        )
+
+    @classmethod
+    def from_csv(cls, csv_path):
+        df = pd.read_csv(
+            csv_path,
+            dtype={ZIP_COLUMN: str, GEOGRAPHY_COLUMN: str},
+            keep_default_na=False
+        )
+        return cls.from_frame(
+            df,
+            meta={
+                "source": os.path.basename(csv_path),
+                "source_sha256": _file_sha256(csv_path),
+            }
+        )
+
+    # ---------------------------
+    # Persistence
+    # ---------------------------
+    def save(self, index_dir):
+        os.makedirs(index_dir, exist_ok=True)
+
+        for name in _ARRAY_FILES:
+            array = getattr(self, name)
+            _atomic_write(
+                os.path.join(index_dir, f"{name}.npy"),
+                lambda f, array=array: np.save(f, np.ascontiguousarray(array))
+            )
+
+        meta = dict(self.meta)
+        meta["format_version"] = INDEX_FORMAT_VERSION
+        meta["geographies"] = self.geographies
+        meta["rates"] = [None if np.isnan(r) else float(r) for r in self.rates]
+
+        # meta.json is written last so a half-written index is never seen as fresh
+        _atomic_write(
+            os.path.join(index_dir, "meta.json"),
+            lambda f: f.write(json.dumps(meta, indent=1).encode("utf-8"))
+        )
+
+    @classmethod
+    def load(cls, index_dir, mmap=True):
+        with open(os.path.join(index_dir, "meta.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+
+        arrays = {
+            name: np.load(
+                os.path.join(index_dir, f"{name}.npy"),
+                mmap_mode="r" if mmap else None
+            )
+            for name in _ARRAY_FILES
+        }
+
+        geographies = meta.pop("geographies")
+        rates = [np.nan if r is None else r for r in meta.pop("rates")]
+
+        return cls(
+            arrays["zips"],
+            arrays["geography_codes"],
+            arrays["rate_codes"],
+            geographies,
+            rates,
+            meta=meta,
+        )
+
+    # ---------------------------
+    # Lookups
+    # ---------------------------
+    def position(self, zip_code):
+        zip_code = str(zip_code).strip()
+        if not zip_code.isdigit():
+            return None
+
+        value = int(zip_code)
+        if value > np.iinfo(self.zips.dtype).max:
+            return None
+
+        # A scalar of the array's dtype avoids casting the array per call
+        value = self.zips.dtype.type(value)
+        pos = int(np.searchsorted(self.zips, value))
+
+        if pos < len(self.zips) and self.zips[pos] == value:
+            return pos
+        return None
+
+
+# -----------------------------------------
+# Build step
+# -----------------------------------------
+def index_dir_for(csv_path, index_root=INDEX_DIR):
+    stem = os.path.splitext(os.path.basename(csv_path))[0]
+    return os.path.join(index_root, stem)
+
+
+def is_index_fresh(csv_path, index_dir):
+    try:
+        with open(os.path.join(index_dir, "meta.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return False
+
+    return (
+        meta.get("format_version") == INDEX_FORMAT_VERSION
+        and meta.get("source_sha256") == _file_sha256(csv_path)
+    )
+
+
+def compile_rate_csv(csv_path, index_root=INDEX_DIR, force=False):
+    index_dir = index_dir_for(csv_path, index_root)
+
+    if force or not is_index_fresh(csv_path, index_dir):
+        RateIndex.from_csv(csv_path).save(index_dir)
+
+    return index_dir
+
+
+def load_rate_index(csv_path, index_root=INDEX_DIR):
+    """Compile csv_path if its index is missing or stale, then memory-map it."""
+    return RateIndex.load(compile_rate_csv(csv_path, index_root))
+
+
+# -----------------------------------------
+# Published report artifacts
+# -----------------------------------------
+# The GUIDE report can publish a run straight into ARTIFACT_DIR as
+# <start_date>_<run_id>/, in the same format as a compiled index plus
+# run_id/start_date in meta.json and the report CSV for downloads. The
+# lookup app loads these by effective date without re-parsing any CSV.
+ARTIFACT_DIR = "rate_artifacts"
+ARTIFACT_CSV_NAME = "respite_rate_geography.csv"
+
+
+def publish_rate_artifact(final_df, csv_bytes=None, artifact_root=ARTIFACT_DIR, **meta):
+    """Save a report table as an index artifact and return its directory."""
+    run_id = int(final_df["run_id"].iloc[0])
+    start_date = str(final_df["start_date"].iloc[0])
+    artifact_dir = os.path.join(artifact_root, f"{start_date}_{run_id}")
+
+    index = RateIndex.from_frame(
+        final_df,
+        meta={"run_id": run_id, "start_date": start_date, **meta}
+    )
+
+    os.makedirs(artifact_dir, exist_ok=True)
+    if csv_bytes is not None:
+        _atomic_write(os.path.join(artifact_dir, ARTIFACT_CSV_NAME), lambda f: f.write(csv_bytes))
+        index.meta["source"] = ARTIFACT_CSV_NAME
+
+    index.save(artifact_dir)
+    return artifact_dir
+
+
+def published_artifacts(artifact_root=ARTIFACT_DIR):
+    """meta.json of the latest run per start_date, oldest start_date first.
+
+    Each meta gets an "index_dir" key; unreadable or older-format
+    artifacts are skipped.
+    """
+    latest = {}
+
+    for meta_path in glob.glob(os.path.join(artifact_root, "*", "meta.json")):
+        try:
+            with open(meta_path, encoding="utf-8") as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            continue
+
+        if meta.get("format_version") != INDEX_FORMAT_VERSION or "start_date" not in meta:
+            continue
+
+        meta["index_dir"] = os.path.dirname(meta_path)
+        current = latest.get(meta["start_date"])
+        if current is None or meta["run_id"] > current["run_id"]:
+            latest[meta["start_date"]] = meta
+
+    return [latest[start_date] for start_date in sorted(latest)]
+
+
+def artifacts_signature(artifact_root=ARTIFACT_DIR):
+    """Changes whenever an artifact is published or replaced.
+
+    Only stats each meta.json (written last by save), so it is cheap enough
+    to check on every page run.
+    """
+    signature = []
+    for meta_path in sorted(glob.glob(os.path.join(artifact_root, "*", "meta.json"))):
+        try:
+            signature.append((meta_path, os.stat(meta_path).st_mtime_ns))
+        except OSError:
+            continue
+    return tuple(signature)
+
+
+def main(argv=None):
+    paths = (argv if argv is not None else sys.argv[1:]) or sorted(
+        glob.glob("respite_rate_geography_*.csv")
+    )
+
+    for path in paths:
+        index_dir = compile_rate_csv(path, force=True)
+        index = RateIndex.load(index_dir)
+        print(
+            f"{path} -> {index_dir} "
+            f"({len(index):,} ZIPs, {len(index.geographies)} geographies, "
+            f"{len(index.rates)} rates)"
+        )
+
+
+if __name__ == "__main__":
+    main()
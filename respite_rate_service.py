@@ -0,0 +1,436 @@
+"""JSON HTTP service for respite rate lookups.
+
+Partner systems query rates here instead of through the Streamlit page.
+Stdlib only: an asyncio server with keep-alive, backed by the same rate
+store as the lookup app, loaded once per process.
+
+    GET  /rate?zip=02134&date=2026-07-01   one ZIP (date defaults to today;
+                                           fallback=0 skips ZIP3 estimates)
+    POST /rates                            {"zips": [...], "date": "..."}
+    GET  /health                           200 once the rate store is loaded
+    GET  /metrics                          request counts, latency, cache
+
+Run from the repository root:
+
+    python respite_rate_service.py --port 8080
+"""
+import argparse
+import asyncio
+import json
+import math
+import time
+from collections import OrderedDict, deque
+from datetime import date
+from urllib.parse import parse_qs, urlsplit
+
+from respite_rate_index import GEOGRAPHY_COLUMN, RATE_COLUMN, ZIP_COLUMN
+from respite_rate_store import (
+    MATCH_EXACT,
+    MATCH_INVALID,
+    MATCH_NOT_FOUND,
+    MATCH_PREFIX,
+    MATCH_PREFIX_AMBIGUOUS,
+    RateStoreLoader,
+    period_on,
+)
+
+CACHE_SIZE = 100_000
+MAX_BATCH = 50_000
+MAX_BODY_BYTES = 4_000_000
+MAX_HEADER_BYTES = 16_384
+IDLE_TIMEOUT = 30
+LATENCY_WINDOW = 10_000
+
+# Batches this large are looked up off the event loop so they don't hold
+# up single-ZIP requests
+THREAD_BATCH = 2_000
+
+STATUS_TEXT = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    413: "Payload Too Large",
+    500: "Internal Server Error",
+    503: "Service Unavailable",
+}
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def _number(value):
+    return None if value is None or math.isnan(value) else round(float(value), 4)
+
+
+def _json_body(obj):
+    # allow_nan=False: NaN is not JSON, so a NaN that slips through fails
+    # loudly (500) instead of reaching clients
+    return json.dumps(obj, allow_nan=False).encode("utf-8")
+
+
+def _reject_constant(name):
+    raise ValueError(f"{name} is not valid JSON")
+
+
+def _parse_date(text):
+    if not text:
+        return date.today()
+    try:
+        return date.fromisoformat(text)
+    except ValueError:
+        raise HTTPError(400, f"date must be YYYY-MM-DD, got {text!r}") from None
+
+
+# -----------------------------------------
+# Caches and metrics
+# -----------------------------------------
+class LRUCache:
+    def __init__(self, size=CACHE_SIZE):
+        self.size = size
+        self.hits = 0
+        self.misses = 0
+        self._items = OrderedDict()
+
+    def get(self, key):
+        try:
+            value = self._items[key]
+        except KeyError:
+            self.misses += 1
+            return None
+
+        self._items.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        self._items[key] = value
+        self._items.move_to_end(key)
+        if len(self._items) > self.size:
+            self._items.popitem(last=False)
+
+    def clear(self):
+        self._items.clear()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._items),
+            "max_size": self.size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+        }
+
+
+class LatencyMetrics:
+    """Per-route request counts and latency percentiles over the last
+    LATENCY_WINDOW requests."""
+
+    def __init__(self, window=LATENCY_WINDOW):
+        self.started = time.time()
+        self.window = window
+        self.routes = {}
+
+    def record(self, route, status, seconds):
+        stats = self.routes.setdefault(route, {
+            "requests": 0,
+            "errors": 0,
+            "latencies": deque(maxlen=self.window),
+        })
+        stats["requests"] += 1
+        stats["errors"] += status >= 400
+        stats["latencies"].append(seconds)
+
+    def summary(self):
+        routes = {}
+        for route, stats in self.routes.items():
+            latencies = sorted(stats["latencies"])
+
+            def percentile(q):
+                return round(latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1000, 3)
+
+            routes[route] = {
+                "requests": stats["requests"],
+                "errors": stats["errors"],
+                "p50_ms": percentile(0.50),
+                "p95_ms": percentile(0.95),
+                "p99_ms": percentile(0.99),
+                "max_ms": round(latencies[-1] * 1000, 3),
+            }
+        return {"uptime_seconds": round(time.time() - self.started, 1), "routes": routes}
+
+
+# -----------------------------------------
+# Lookups
+# -----------------------------------------
+class RateService:
+    def __init__(self, loader=None, cache_size=CACHE_SIZE):
+        self.loader = loader if loader is not None else RateStoreLoader()
+        self.cache = LRUCache(cache_size)
+        self.metrics = LatencyMetrics()
+
+    def _store(self):
+        if not self.loader.ready:
+            raise HTTPError(503, "rate tables are still loading")
+        if self.loader.store is None:
+            raise HTTPError(503, f"no rate tables loaded: {self.loader.error or self.loader.missing}")
+        return self.loader.store
+
+    def _period_label(self, day):
+        period = period_on(day, self.loader.periods)
+        return period.label if period else None
+
+    def rate(self, query):
+        """Body bytes for GET /rate; answers are cached per ZIP, date and fallback."""
+        zip_code = query.get("zip", [""])[0].strip()
+        day = _parse_date(query.get("date", [""])[0])
+        fallback = query.get("fallback", ["1"])[0] != "0"
+
+        key = (zip_code, day, fallback)
+        body = self.cache.get(key)
+        if body is None:
+            body = _json_body(self._single(zip_code, day, fallback))
+            self.cache.put(key, body)
+        return body
+
+    def _single(self, zip_code, day, fallback):
+        store = self._store()
+        result = {
+            "zip": zip_code.zfill(5) if zip_code.isdigit() and len(zip_code) <= 5 else zip_code,
+            "date": day.isoformat(),
+            "period": self._period_label(day),
+            "geography": None,
+            "rate": None,
+            "match": MATCH_INVALID,
+            "confidence": None,
+        }
+        if not zip_code.isdigit() or len(zip_code) > 5:
+            return result
+
+        found = store.rate_on(zip_code, day)
+        if found is not None:
+            geography, rate = found
+            result.update(geography=geography, rate=_number(rate), match=MATCH_EXACT, confidence=1.0)
+            return result
+
+        estimate = store.estimate_on(zip_code, day) if fallback else None
+        if estimate is None:
+            result["match"] = MATCH_NOT_FOUND
+            return result
+
+        result.update(
+            geography=estimate.geography,
+            rate=_number(estimate.rate),
+            match=MATCH_PREFIX_AMBIGUOUS if estimate.ambiguous else MATCH_PREFIX,
+            confidence=_number(estimate.share),
+        )
+        return result
+
+    def rates(self, payload):
+        """Body bytes for POST /rates."""
+        if not isinstance(payload, dict) or not isinstance(payload.get("zips"), list):
+            raise HTTPError(400, 'body must be a JSON object with a "zips" list')
+        if len(payload["zips"]) > MAX_BATCH:
+            raise HTTPError(413, f"at most {MAX_BATCH:,} ZIPs per request")
+
+        fallback = payload.get("fallback", True)
+        if not isinstance(fallback, bool):
+            raise HTTPError(400, '"fallback" must be true or false')
+
+        day = _parse_date(payload.get("date"))
+        df = self._store().lookup_many(payload["zips"], day, fallback=fallback)
+
+        results = [
+            {
+                "input": item,
+                "zip": zip_code or None,
+                "geography": geography if match in (MATCH_EXACT, MATCH_PREFIX, MATCH_PREFIX_AMBIGUOUS) else None,
+                "rate": _number(rate),
+                "match": match,
+                "confidence": _number(confidence),
+            }
+            # Inputs are echoed as sent, not as lookup_many's strings
+            for item, zip_code, geography, rate, match, confidence in zip(
+                payload["zips"],
+                df[ZIP_COLUMN].tolist(),
+                df[GEOGRAPHY_COLUMN].tolist(),
+                df[RATE_COLUMN].tolist(),
+                df["Match"].tolist(),
+                df["Confidence"].tolist(),
+            )
+        ]
+        return _json_body({
+            "date": day.isoformat(),
+            "period": self._period_label(day),
+            "results": results,
+        })
+
+    def health(self):
+        if not self.loader.ready:
+            raise HTTPError(503, "rate tables are still loading")
+        return _json_body({
+            "status": "ok" if self.loader.store is not None else "error",
+            "load_seconds": _number(self.loader.seconds),
+            "periods": [period.label for period in self.loader.periods],
+            "missing": self.loader.missing,
+        })
+
+    def metrics_body(self):
+        return _json_body({**self.metrics.summary(), "cache": self.cache.stats()})
+
+    # ---------------------------
+    # Routing
+    # ---------------------------
+    async def dispatch(self, method, target, body):
+        """Return (route, status, body bytes) for one request."""
+        url = urlsplit(target)
+        route = url.path.rstrip("/") or "/"
+
+        try:
+            if route == "/rate":
+                if method != "GET":
+                    raise HTTPError(405, "use GET")
+                return route, 200, self.rate(parse_qs(url.query))
+
+            if route == "/rates":
+                if method != "POST":
+                    raise HTTPError(405, "use POST")
+                try:
+                    payload = json.loads(body or b"null", parse_constant=_reject_constant)
+                except ValueError:
+                    raise HTTPError(400, "body is not valid JSON") from None
+
+                zips = payload.get("zips") if isinstance(payload, dict) else None
+                if isinstance(zips, list) and len(zips) >= THREAD_BATCH:
+                    return route, 200, await asyncio.to_thread(self.rates, payload)
+                return route, 200, self.rates(payload)
+
+            if route == "/health":
+                return route, 200, self.health()
+            if route == "/metrics":
+                return route, 200, self.metrics_body()
+
+            raise HTTPError(404, f"no route {url.path}")
+        except HTTPError as e:
+            return route, e.status, _json_body({"error": str(e)})
+        except Exception as e:
+            return route, 500, _json_body({"error": f"{type(e).__name__}: {e}"})
+
+
+# -----------------------------------------
+# HTTP/1.1 server
+# -----------------------------------------
+def _response(status, body, keep_alive):
+    head = (
+        f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}\r\n"
+        "Content-Type: application/json\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n"
+        "\r\n"
+    )
+    return head.encode("latin-1") + body
+
+
+async def _read_request(reader):
+    """(method, target, version, headers, body), or None when the client is done."""
+    try:
+        head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), IDLE_TIMEOUT)
+    except (asyncio.IncompleteReadError, asyncio.TimeoutError, ConnectionError):
+        return None
+    except asyncio.LimitOverrunError:
+        raise HTTPError(413, "request headers too large") from None
+
+    lines = head.decode("latin-1").split("\r\n")
+    try:
+        method, target, version = lines[0].split(" ", 2)
+    except ValueError:
+        raise HTTPError(400, "malformed request line") from None
+
+    headers = {}
+    for line in lines[1:]:
+        name, _, value = line.partition(":")
+        if name:
+            headers[name.strip().lower()] = value.strip()
+
+    content_length = headers.get("content-length") or "0"
+    if not (content_length.isascii() and content_length.isdigit()):
+        raise HTTPError(400, f"invalid Content-Length {content_length!r}")
+
+    length = int(content_length)
+    if length > MAX_BODY_BYTES:
+        raise HTTPError(413, f"request body over {MAX_BODY_BYTES:,} bytes")
+    body = await reader.readexactly(length) if length else b""
+
+    return method, target, version, headers, body
+
+
+async def handle_connection(service, reader, writer):
+    try:
+        while True:
+            try:
+                request = await _read_request(reader)
+            except HTTPError as e:
+                writer.write(_response(e.status, _json_body({"error": str(e)}), False))
+                break
+            if request is None:
+                break
+
+            start = time.perf_counter()
+            method, target, version, headers, body = request
+            route, status, response_body = await service.dispatch(method, target, body)
+
+            connection = headers.get("connection", "").lower()
+            keep_alive = connection != "close" and (version == "HTTP/1.1" or connection == "keep-alive")
+
+            writer.write(_response(status, response_body, keep_alive))
+            await writer.drain()
+            service.metrics.record(route, status, time.perf_counter() - start)
+
+            if not keep_alive:
+                break
+    except (ConnectionError, asyncio.IncompleteReadError):
+        pass
+    finally:
+        writer.close()
+
+
+async def serve(service, host="127.0.0.1", port=8080):
+    """Start serving; returns the asyncio server."""
+    return await asyncio.start_server(
+        lambda reader, writer: handle_connection(service, reader, writer),
+        host,
+        port,
+        limit=MAX_HEADER_BYTES,
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="JSON HTTP service for respite rate lookups.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--cache-size", type=int, default=CACHE_SIZE, help="responses kept in the LRU cache")
+    args = parser.parse_args(argv)
+
+    async def run():
+        service = RateService(cache_size=args.cache_size)
+        server = await serve(service, args.host, args.port)
+        print(f"Serving respite rates on http://{args.host}:{args.port} (loading rate tables...)")
+
+        await asyncio.to_thread(service.loader.wait)
+        print(f"Rate tables loaded in {service.loader.seconds:.2f}s: {len(service.loader.periods)} periods")
+
+        async with server:
+            await server.serve_forever()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
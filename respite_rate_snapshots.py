@@ -0,0 +1,346 @@
+import csv
+import glob
+import hashlib
+import io
+import json
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+from respite_rate_index import (
+    GEOGRAPHY_COLUMN,
+    RATE_COLUMN,
+    ZIP_COLUMN,
+    RateIndex,
+    _atomic_write,
+    _code_dtype,
+    _file_sha256,
+)
+
+# -----------------------------------------
+# Snapshot + delta storage for the rate CSVs
+# -----------------------------------------
+# Every period CSV lists the same ~43k ZIPs with the same geographies, and
+# within a period the rate only depends on the geography. So a period is
+# stored as:
+#
+#   base             a ZIP/geography snapshot, shared by many periods
+#   geography_rates  one rate per geography (~110 numbers)
+#   changes          ZIP -> geography for base ZIPs whose geography changed
+#   added            ZIP -> [row, geography] for ZIPs not in the base, with
+#                    the row they sit on in the period's file
+#   removed          ZIPs in the base but not in this period
+#   rate_overrides   ZIP -> rate where a ZIP's rate is not its geography's
+#
+# Snapshot arrays are .npy blobs in objects/, named by their sha256, so
+# identical snapshots are stored once. A period gets a new snapshot of its
+# own when its delta grows past REBASE_FRACTION of its rows, or when it
+# lists the base's ZIPs in a different order.
+#
+#   rate_snapshots/manifest.json
+#   rate_snapshots/objects/<sha256>.npy
+
+SNAPSHOT_DIR = "rate_snapshots"
+SNAPSHOT_FORMAT_VERSION = 2
+REBASE_FRACTION = 0.25
+
+_CSV_COLUMNS = [ZIP_COLUMN, GEOGRAPHY_COLUMN, RATE_COLUMN]
+
+
+def _json_rate(rate):
+    return None if np.isnan(rate) else float(rate)
+
+
+def _put_object(snapshot_dir, array):
+    buffer = io.BytesIO()
+    np.save(buffer, np.ascontiguousarray(array))
+    data = buffer.getvalue()
+
+    digest = hashlib.sha256(data).hexdigest()
+    path = os.path.join(snapshot_dir, "objects", f"{digest}.npy")
+
+    if not os.path.exists(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        _atomic_write(path, lambda f: f.write(data))
+
+    return digest
+
+
+def _get_object(snapshot_dir, digest):
+    return np.load(os.path.join(snapshot_dir, "objects", f"{digest}.npy"))
+
+
+def read_manifest(snapshot_dir=SNAPSHOT_DIR):
+    try:
+        with open(os.path.join(snapshot_dir, "manifest.json"), encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    if manifest.get("format_version") != SNAPSHOT_FORMAT_VERSION:
+        return None
+    return manifest
+
+
+# -----------------------------------------
+# Build step
+# -----------------------------------------
+def _read_period_csv(csv_path):
+    df = pd.read_csv(
+        csv_path,
+        dtype={ZIP_COLUMN: str, GEOGRAPHY_COLUMN: str},
+        keep_default_na=False
+    )
+
+    zips = pd.to_numeric(df[ZIP_COLUMN].str.extract(r"(\d+)")[0], errors="coerce")
+    keep = zips.notna().to_numpy()
+
+    # File order is kept so the CSV can be rebuilt byte for byte
+    period = pd.DataFrame({
+        "zip": zips[keep].astype(np.uint32).to_numpy(),
+        "geography": df[GEOGRAPHY_COLUMN][keep].str.strip().to_numpy(),
+        "rate": pd.to_numeric(df[RATE_COLUMN][keep], errors="coerce").to_numpy(),
+    })
+    return period.drop_duplicates("zip").reset_index(drop=True)
+
+
+def _delta(period, base_zips, base_geographies):
+    """Delta of a period against a base, or None if the period lists the
+    base's ZIPs in another order (only inserts and removals are kept)."""
+    base = pd.Series(base_geographies, index=base_zips)
+    current = pd.Series(period["geography"].to_numpy(), index=period["zip"].to_numpy())
+
+    in_base = current.index.isin(base.index)
+    in_current = base.index.isin(current.index)
+    if not np.array_equal(current.index[in_base], base.index[in_current]):
+        return None
+
+    shared = current[in_base]
+    changed = shared[shared.to_numpy() != base[in_current].to_numpy()]
+    added_rows = np.flatnonzero(~in_base)
+
+    return {
+        "changes": {f"{z:05d}": g for z, g in changed.items()},
+        "added": {
+            f"{z:05d}": [int(row), g]
+            for row, z, g in zip(added_rows, current.index[added_rows], current.to_numpy()[added_rows])
+        },
+        "removed": [f"{z:05d}" for z in base.index[~in_current]],
+    }
+
+
+def _geography_rates(period, geographies):
+    # Most common rate per geography; ZIPs that disagree become overrides
+    counts = period.groupby(["geography", "rate"], dropna=False).size().reset_index(name="n")
+    top = counts.sort_values("n", ascending=False, kind="stable").drop_duplicates("geography")
+    by_geography = dict(zip(top["geography"], top["rate"]))
+
+    expected = period["geography"].map(by_geography).to_numpy(np.float64)
+    actual = period["rate"].to_numpy(np.float64)
+    differs = ~((expected == actual) | (np.isnan(expected) & np.isnan(actual)))
+
+    overrides = {
+        f"{z:05d}": _json_rate(r)
+        for z, r in zip(period["zip"][differs], actual[differs])
+    }
+    rates = [_json_rate(by_geography.get(g, np.nan)) for g in geographies]
+    return rates, overrides
+
+
+def build_snapshots(csv_paths, snapshot_dir=SNAPSHOT_DIR):
+    """Store the period CSVs as snapshots plus deltas and write the manifest.
+
+    csv_paths are taken in order; each period's delta is taken against the
+    most recent snapshot. Every period is checked to rebuild its CSV
+    byte for byte before the manifest is written.
+    """
+    periods = [(path, _read_period_csv(path)) for path in csv_paths]
+    geographies = sorted({g for _, period in periods for g in period["geography"]})
+    geography_pos = {g: i for i, g in enumerate(geographies)}
+
+    manifest = {
+        "format_version": SNAPSHOT_FORMAT_VERSION,
+        "geographies": geographies,
+        "periods": {},
+    }
+
+    base = None
+    for path, period in periods:
+        delta = None
+        if base is not None:
+            delta = _delta(period, base["zips_array"], base["geographies_array"])
+            if delta is not None and (
+                len(delta["changes"]) + len(delta["added"]) + len(delta["removed"])
+                > REBASE_FRACTION * len(period)
+            ):
+                delta = None
+
+        if delta is None:
+            codes = period["geography"].map(geography_pos).to_numpy()
+            base = {
+                "zips": _put_object(snapshot_dir, period["zip"].to_numpy(np.uint32)),
+                "geography_codes": _put_object(
+                    snapshot_dir, codes.astype(_code_dtype(len(geographies)))
+                ),
+                "zips_array": period["zip"].to_numpy(),
+                "geographies_array": period["geography"].to_numpy(),
+            }
+            delta = {"changes": {}, "added": {}, "removed": []}
+
+        geography_rates, rate_overrides = _geography_rates(period, geographies)
+
+        manifest["periods"][os.path.basename(path)] = {
+            "source_sha256": _file_sha256(path),
+            "base": {"zips": base["zips"], "geography_codes": base["geography_codes"]},
+            "changes": {z: geography_pos[g] for z, g in delta["changes"].items()},
+            "added": {z: [row, geography_pos[g]] for z, (row, g) in delta["added"].items()},
+            "removed": delta["removed"],
+            "geography_rates": geography_rates,
+            "rate_overrides": rate_overrides,
+        }
+
+    for path, _ in periods:
+        with open(path, "rb") as f:
+            if period_csv_bytes(os.path.basename(path), snapshot_dir, manifest) != f.read():
+                raise ValueError(f"{path} cannot be rebuilt exactly from its snapshot")
+
+    _atomic_write(
+        os.path.join(snapshot_dir, "manifest.json"),
+        lambda f: f.write(json.dumps(manifest, indent=1).encode("utf-8"))
+    )
+    return manifest
+
+
+# -----------------------------------------
+# Loading
+# -----------------------------------------
+def load_period(filename, snapshot_dir=SNAPSHOT_DIR, manifest=None):
+    """Rebuild one period as (zips, geography_codes, rates) in file order.
+
+    Returns None when the period is not in the snapshot store.
+    """
+    manifest = manifest or read_manifest(snapshot_dir)
+    entry = (manifest or {}).get("periods", {}).get(os.path.basename(filename))
+    if entry is None:
+        return None
+
+    zips = _get_object(snapshot_dir, entry["base"]["zips"])
+    codes = _get_object(snapshot_dir, entry["base"]["geography_codes"])
+
+    if entry["removed"]:
+        keep = ~np.isin(zips, np.array(entry["removed"], dtype=np.uint32))
+        zips, codes = zips[keep], codes[keep]
+
+    if entry["changes"]:
+        change_zips = np.array(list(entry["changes"]), dtype=np.uint32)
+        change_codes = np.array(list(entry["changes"].values()), dtype=codes.dtype)
+
+        codes = codes.copy()
+        codes[pd.Index(zips).get_indexer(change_zips)] = change_codes
+
+    if entry["added"]:
+        # Added ZIPs go back on their rows; the base rows fill the rest in order
+        added_zips = np.array(list(entry["added"]), dtype=np.uint32)
+        added_rows, added_codes = np.array(list(entry["added"].values()), dtype=np.int64).T
+
+        from_base = np.ones(len(zips) + len(added_zips), dtype=bool)
+        from_base[added_rows] = False
+
+        all_zips = np.empty(len(from_base), dtype=zips.dtype)
+        all_codes = np.empty(len(from_base), dtype=codes.dtype)
+        all_zips[from_base], all_zips[added_rows] = zips, added_zips
+        all_codes[from_base], all_codes[added_rows] = codes, added_codes
+        zips, codes = all_zips, all_codes
+
+    geography_rates = np.array(
+        [np.nan if r is None else r for r in entry["geography_rates"]], dtype=np.float64
+    )
+    rates = geography_rates[codes]
+
+    if entry["rate_overrides"]:
+        override_zips = np.array(list(entry["rate_overrides"]), dtype=np.uint32)
+        positions = pd.Index(zips).get_indexer(override_zips)
+        rates[positions] = [
+            np.nan if r is None else r for r in entry["rate_overrides"].values()
+        ]
+
+    return zips, codes, rates
+
+
+def snapshot_is_fresh(csv_path, snapshot_dir=SNAPSHOT_DIR, manifest=None):
+    """True if the period is stored and matches the CSV (or the CSV is gone)."""
+    manifest = manifest or read_manifest(snapshot_dir)
+    entry = (manifest or {}).get("periods", {}).get(os.path.basename(csv_path))
+    if entry is None:
+        return False
+
+    return not os.path.exists(csv_path) or _file_sha256(csv_path) == entry["source_sha256"]
+
+
+def load_snapshot_index(csv_path, snapshot_dir=SNAPSHOT_DIR, manifest=None):
+    """RateIndex for a period CSV from the snapshot store, or None if stale/absent."""
+    manifest = manifest or read_manifest(snapshot_dir)
+    if not snapshot_is_fresh(csv_path, snapshot_dir, manifest):
+        return None
+
+    zips, codes, rates = load_period(csv_path, snapshot_dir, manifest)
+    rate_codes, rate_table = pd.factorize(rates, sort=True, use_na_sentinel=False)
+
+    order = np.argsort(zips, kind="stable")
+    return RateIndex(
+        zips[order],
+        codes[order],
+        rate_codes[order].astype(_code_dtype(len(rate_table))),
+        manifest["geographies"],
+        rate_table,
+        meta={"source": os.path.basename(csv_path), "snapshot_dir": snapshot_dir},
+    )
+
+
+def period_csv_bytes(filename, snapshot_dir=SNAPSHOT_DIR, manifest=None):
+    """The period CSV exactly as it was stored, rebuilt from the snapshot."""
+    manifest = manifest or read_manifest(snapshot_dir)
+    zips, codes, rates = load_period(filename, snapshot_dir, manifest)
+    geographies = np.asarray(manifest["geographies"], dtype=object)
+
+    output = io.StringIO()
+    writer = csv.writer(output, quoting=csv.QUOTE_MINIMAL, lineterminator="\n")
+    writer.writerow(_CSV_COLUMNS)
+    writer.writerows(zip(
+        [f'="{z:05d}"' for z in zips.tolist()],
+        geographies[codes],
+        ["NA" if np.isnan(r) else f"{r:.2f}" for r in rates.tolist()],
+    ))
+    return output.getvalue().encode("utf-8")
+
+
+def main(argv=None):
+    # Deltas are taken in period order, oldest first
+    from respite_rate_store import RATE_PERIODS
+
+    paths = (argv if argv is not None else sys.argv[1:]) or [
+        period.filename for period in RATE_PERIODS
+    ]
+
+    manifest = build_snapshots(paths)
+    bases = {entry["base"]["zips"] for entry in manifest["periods"].values()}
+
+    for name, entry in manifest["periods"].items():
+        print(
+            f"{name}: {len(entry['changes']):,} changed, {len(entry['added']):,} added, "
+            f"{len(entry['removed']):,} removed, "
+            f"{len(entry['rate_overrides']):,} rate overrides"
+        )
+
+    size = sum(
+        os.path.getsize(path)
+        for path in glob.glob(os.path.join(SNAPSHOT_DIR, "**", "*"), recursive=True)
+        if os.path.isfile(path)
+    )
+    print(f"{SNAPSHOT_DIR}: {len(bases)} snapshot(s), {size / 1e3:,.0f} kB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,593 @@
+import os
+import threading
+import time
+from collections import namedtuple
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+from respite_rate_index import (
+    ARTIFACT_CSV_NAME,
+    ARTIFACT_DIR,
+    GEOGRAPHY_COLUMN,
+    RATE_COLUMN,
+    ZIP_COLUMN,
+    RateIndex,
+    load_rate_index,
+    published_artifacts,
+)
+from respite_rate_snapshots import SNAPSHOT_DIR, load_snapshot_index, period_csv_bytes, read_manifest
+
+# -----------------------------------------
+# Rate periods
+# -----------------------------------------
+# Single source of truth for the period labels, their CSV files and the
+# dates they are effective. end=None means "onwards". index_dir is set for
+# periods published by the GUIDE report (see rate_periods below).
+RatePeriod = namedtuple(
+    "RatePeriod",
+    ["label", "filename", "start", "end", "index_dir"],
+    defaults=[None]
+)
+
+RATE_PERIODS = [
+    RatePeriod(
+        "July 1, 2025 – December 31, 2025",
+        "respite_rate_geography_2025.csv",
+        date(2025, 7, 1),
+        date(2025, 12, 31),
+    ),
+    RatePeriod(
+        "January 1, 2026 – January 31, 2026",
+        "respite_rate_geography_2026_jan.csv",
+        date(2026, 1, 1),
+        date(2026, 1, 31),
+    ),
+    RatePeriod(
+        "February 1, 2026 – June 30, 2026",
+        "respite_rate_geography_2026_feb.csv",
+        date(2026, 2, 1),
+        date(2026, 6, 30),
+    ),
+    RatePeriod(
+        "July 1, 2026 – Onwards",
+        "respite_rate_geography_2026_july.csv",
+        date(2026, 7, 1),
+        None,
+    ),
+]
+
+
+def get_period(label, periods=RATE_PERIODS):
+    for period in periods:
+        if period.label == label:
+            return period
+    return None
+
+
+def period_on(day, periods=RATE_PERIODS):
+    """The period in effect on a date, or None."""
+    for period in periods:
+        if period.start <= day and (period.end is None or day <= period.end):
+            return period
+    return None
+
+
+def download_name(period):
+    """File name for a period's CSV in downloads.
+
+    Published artifacts all store their CSV as ARTIFACT_CSV_NAME, so their
+    names carry the start date to stay unique in one archive.
+    """
+    if period.index_dir is None:
+        return os.path.basename(period.filename)
+
+    root, ext = os.path.splitext(ARTIFACT_CSV_NAME)
+    return f"{root}_{period.start.isoformat()}{ext}"
+
+
+def valid_date_text(period):
+    return f"Valid {period.label}"
+
+
+def _date_text(day):
+    return f"{day:%B} {day.day}, {day.year}"
+
+
+def period_label(start, end):
+    return f"{_date_text(start)} – {_date_text(end) if end else 'Onwards'}"
+
+
+def rate_periods(periods=RATE_PERIODS, artifact_root=ARTIFACT_DIR):
+    """The CSV periods plus every published report artifact.
+
+    An artifact replaces the CSV period starting on the same date, and each
+    period now ends the day before the next one starts.
+    """
+    by_start = {period.start: period for period in periods}
+
+    for meta in published_artifacts(artifact_root):
+        start = date.fromisoformat(meta["start_date"])
+        by_start[start] = RatePeriod(
+            None,
+            os.path.join(meta["index_dir"], ARTIFACT_CSV_NAME),
+            start,
+            None,
+            meta["index_dir"],
+        )
+
+    merged = []
+    starts = sorted(by_start)
+    for start, next_start in zip(starts, starts[1:] + [None]):
+        period = by_start[start]
+        end = period.end
+
+        if next_start is not None and (end is None or end >= next_start):
+            end = next_start - timedelta(days=1)
+
+        if period.label is None or end != period.end:
+            period = period._replace(label=period_label(start, end), end=end)
+        merged.append(period)
+
+    return merged
+
+
+# -----------------------------------------
+# Versioned rate store
+# -----------------------------------------
+# Every (ZIP, geography, rate) is stored as a run covering a date range.
+# Consecutive periods in which a ZIP keeps the same geography and rate
+# collapse into a single run, so unchanged rows are only stored once.
+
+_OPEN_END = np.iinfo(np.int32).max
+
+MATCH_EXACT = "exact"
+MATCH_PREFIX = "zip3 estimate"
+MATCH_PREFIX_AMBIGUOUS = "zip3 estimate (ambiguous)"
+MATCH_NOT_FOUND = "not found"
+MATCH_INVALID = "invalid"
+
+# ZIP3 prefix fallback: new and PO-box ZIPs are often missing from the CMS
+# file. A missing ZIP gets the geography most of its ZIP3 prefix's ZIPs
+# (zip // 100) are in, that geography's rate, and the share of the
+# prefix's ZIPs it covers as a confidence. A prefix whose ZIPs span more
+# than one geography is flagged as ambiguous. Tables are arrays indexed by
+# prefix, so a miss is O(1).
+ZIP3_PREFIXES = 1000
+
+PrefixTable = namedtuple("PrefixTable", ["geography", "rate", "share", "ambiguous", "zip_count"])
+PrefixEstimate = namedtuple(
+    "PrefixEstimate",
+    ["prefix", "geography", "rate", "share", "ambiguous", "zip_count"]
+)
+
+
+def _ordinal(day):
+    if isinstance(day, str):
+        day = date.fromisoformat(day)
+    return day.toordinal()
+
+
+class RateStore:
+    def __init__(self, zips, starts, ends, geography_codes, rate_codes, geographies, rates):
+        self.zips = zips
+        self.starts = starts
+        self.ends = ends
+        self.geography_codes = geography_codes
+        self.rate_codes = rate_codes
+        self.geographies = list(geographies)
+        self.rates = np.asarray(rates, dtype=np.float64)
+        self._active = {}
+        self._prefixes = {}
+
+    def __len__(self):
+        return len(self.zips)
+
+    @classmethod
+    def from_indexes(cls, period_indexes):
+        """Build a store from [(RatePeriod, RateIndex), ...] pairs."""
+        period_indexes = sorted(period_indexes, key=lambda item: item[0].start)
+
+        geographies = sorted({g for _, index in period_indexes for g in index.geographies})
+        geography_pos = {g: i for i, g in enumerate(geographies)}
+
+        rate_values = pd.Series(
+            np.concatenate([index.rates for _, index in period_indexes])
+        )
+        _, rates = pd.factorize(rate_values, sort=True, use_na_sentinel=False)
+        rates = np.asarray(rates, dtype=np.float64)
+
+        parts = []
+        for period, index in period_indexes:
+            geography_map = np.array(
+                [geography_pos[g] for g in index.geographies], dtype=np.int64
+            )
+            rate_map = pd.Index(rates).get_indexer(index.rates)
+
+            parts.append(pd.DataFrame({
+                "zip": np.asarray(index.zips, dtype=np.uint32),
+                "start": _ordinal(period.start),
+                "end": _ordinal(period.end) if period.end else _OPEN_END,
+                "geography": geography_map[index.geography_codes],
+                "rate": rate_map[index.rate_codes],
+            }))
+
+        rows = (
+            pd.concat(parts, ignore_index=True)
+            .sort_values(["zip", "start"], kind="stable")
+            .reset_index(drop=True)
+        )
+
+        # A row continues the previous run when it is the same ZIP, starts
+        # the day after the previous row ends (no period missing between
+        # them), and has the same geography and rate
+        previous = rows.shift(1)
+        continues = (
+            (rows["zip"] == previous["zip"])
+            & (rows["start"] == previous["end"] + 1)
+            & (rows["geography"] == previous["geography"])
+            & (rows["rate"] == previous["rate"])
+        ).to_numpy()
+
+        run_id = np.cumsum(~continues) - 1
+        runs = rows.groupby(run_id, sort=True).agg(
+            zip=("zip", "first"),
+            start=("start", "first"),
+            end=("end", "last"),
+            geography=("geography", "first"),
+            rate=("rate", "first"),
+        )
+
+        return cls(
+            runs["zip"].to_numpy(np.uint32),
+            runs["start"].to_numpy(np.int32),
+            runs["end"].to_numpy(np.int32),
+            runs["geography"].to_numpy(np.uint16 if len(geographies) > 256 else np.uint8),
+            runs["rate"].to_numpy(np.uint16 if len(rates) > 256 else np.uint8),
+            geographies,
+            rates,
+        )
+
+    # ---------------------------
+    # Lookups
+    # ---------------------------
+    def _zip_slice(self, zip_code):
+        zip_code = str(zip_code).strip()
+        if not zip_code.isdigit():
+            return 0, 0
+
+        # Search with a scalar of the array's dtype: a Python int makes
+        # numpy cast the whole ZIP array to int64 on every call
+        value = int(zip_code)
+        if value > np.iinfo(self.zips.dtype).max:
+            return 0, 0
+
+        value = self.zips.dtype.type(value)
+        lo = int(np.searchsorted(self.zips, value, side="left"))
+        hi = int(np.searchsorted(self.zips, value, side="right"))
+        return lo, hi
+
+    def _run(self, pos):
+        return (
+            self.geographies[self.geography_codes[pos]],
+            float(self.rates[self.rate_codes[pos]]),
+        )
+
+    def rate_on(self, zip_code, on_date):
+        """Return (geography, rate) for a ZIP on a date, or None."""
+        lo, hi = self._zip_slice(zip_code)
+        if lo == hi:
+            return None
+
+        day = _ordinal(on_date)
+        pos = lo + int(np.searchsorted(self.starts[lo:hi], day, side="right")) - 1
+
+        if pos < lo or self.ends[pos] < day:
+            return None
+        return self._run(pos)
+
+    def history(self, zip_code):
+        """Return every run for a ZIP as a list of dicts, oldest first."""
+        lo, hi = self._zip_slice(zip_code)
+
+        history = []
+        for pos in range(lo, hi):
+            geography, rate = self._run(pos)
+            end = int(self.ends[pos])
+            history.append({
+                "start": date.fromordinal(int(self.starts[pos])),
+                "end": None if end == _OPEN_END else date.fromordinal(end),
+                "geography": geography,
+                "rate": rate,
+            })
+        return history
+
+    def _active_runs(self, day):
+        # Runs in effect on a day, one per ZIP and still sorted by ZIP
+        if day not in self._active:
+            active = (self.starts <= day) & (self.ends >= day)
+            self._active[day] = (
+                self.zips[active],
+                self.geography_codes[active],
+                self.rate_codes[active],
+            )
+        return self._active[day]
+
+    def _prefix_table(self, day):
+        if day not in self._prefixes:
+            zips, geography_codes, rate_codes = self._active_runs(day)
+            prefixes = (zips // 100).astype(np.int64)
+            n_geographies, n_rates = len(self.geographies), len(self.rates)
+
+            by_geography = np.bincount(
+                prefixes * n_geographies + geography_codes,
+                minlength=ZIP3_PREFIXES * n_geographies
+            ).reshape(ZIP3_PREFIXES, n_geographies)
+
+            zip_count = by_geography.sum(axis=1)
+            geography = np.where(zip_count > 0, by_geography.argmax(axis=1), -1)
+            share = by_geography.max(axis=1) / np.maximum(zip_count, 1)
+
+            # The rate of the chosen geography, from the prefix's own ZIPs
+            in_geography = geography_codes == geography[prefixes]
+            by_rate = np.bincount(
+                prefixes[in_geography] * n_rates + rate_codes[in_geography],
+                minlength=ZIP3_PREFIXES * n_rates
+            ).reshape(ZIP3_PREFIXES, n_rates)
+
+            self._prefixes[day] = PrefixTable(
+                geography,
+                by_rate.argmax(axis=1),
+                share,
+                (by_geography > 0).sum(axis=1) > 1,
+                zip_count,
+            )
+        return self._prefixes[day]
+
+    def estimate_on(self, zip_code, on_date):
+        """Best guess for a ZIP from its ZIP3 prefix, as a PrefixEstimate.
+
+        None when the ZIP is not valid or no ZIP with its prefix has a
+        rate on the date.
+        """
+        zip_code = str(zip_code).strip()
+        if not zip_code.isdigit() or len(zip_code) > 5:
+            return None
+
+        prefix = int(zip_code) // 100
+        table = self._prefix_table(_ordinal(on_date))
+        if table.geography[prefix] < 0:
+            return None
+
+        return PrefixEstimate(
+            f"{prefix:03d}",
+            self.geographies[table.geography[prefix]],
+            float(self.rates[table.rate[prefix]]),
+            float(table.share[prefix]),
+            bool(table.ambiguous[prefix]),
+            int(table.zip_count[prefix]),
+        )
+
+    def search_zip_codes(self, prefix, on_date, limit=10):
+        """Top `limit` ZIPs active on a date that start with `prefix`.
+
+        Every 5-digit ZIP starting with a k-digit prefix p lies in
+        [p * 10**(5-k), (p + 1) * 10**(5-k)), so this is two binary searches
+        over the sorted ZIP array.
+        """
+        prefix = str(prefix).strip()
+        if not prefix.isdigit() or len(prefix) > 5:
+            return []
+
+        zips, _, _ = self._active_runs(_ordinal(on_date))
+        scale = 10 ** (5 - len(prefix))
+        lo = int(np.searchsorted(zips, zips.dtype.type(int(prefix) * scale), side="left"))
+        hi = int(np.searchsorted(zips, zips.dtype.type((int(prefix) + 1) * scale), side="left"))
+
+        return [f"{z:05d}" for z in zips[lo:min(hi, lo + limit)].tolist()]
+
+    def lookup_many(self, zip_codes, on_date, fallback=True):
+        """Vectorized lookup of many ZIPs on one date.
+
+        Accepts raw values (ints, "2134", '="02134"', ...) and returns one
+        row per input, in input order, with a Match column of "exact",
+        "zip3 estimate", "zip3 estimate (ambiguous)", "not found" or
+        "invalid" and a Confidence column (1 for exact matches, the prefix
+        share for estimates). fallback=False skips the ZIP3 estimates.
+        """
+        raw = pd.Series(list(zip_codes), dtype=object)
+        digits = raw.astype(str).str.extract(r"(\d+)")[0]
+        valid = (digits.notna() & (digits.str.len() <= 5)).to_numpy()
+
+        normalized = digits.where(valid).str.zfill(5)
+        values = pd.to_numeric(normalized, errors="coerce").fillna(0).to_numpy(np.int64)
+
+        day = _ordinal(on_date)
+        zips, geography_codes, rate_codes = self._active_runs(day)
+        geography_names = np.asarray(self.geographies, dtype=object)
+
+        found = np.zeros(len(values), dtype=bool)
+        geography = np.full(len(values), "NA", dtype=object)
+        rate = np.full(len(values), np.nan)
+        confidence = np.full(len(values), np.nan)
+        match = np.where(valid, MATCH_NOT_FOUND, MATCH_INVALID).astype(object)
+
+        if len(zips):
+            pos = np.minimum(np.searchsorted(zips, values), len(zips) - 1)
+            found = valid & (zips[pos] == values)
+            hits = pos[found]
+
+            geography[found] = geography_names[geography_codes[hits]]
+            rate[found] = self.rates[rate_codes[hits]]
+            confidence[found] = 1.0
+            match[found] = MATCH_EXACT
+
+        if fallback and len(zips):
+            table = self._prefix_table(day)
+            misses = np.flatnonzero(valid & ~found)
+            prefixes = values[misses] // 100
+
+            known = table.geography[prefixes] >= 0
+            misses, prefixes = misses[known], prefixes[known]
+
+            geography[misses] = geography_names[table.geography[prefixes]]
+            rate[misses] = self.rates[table.rate[prefixes]]
+            confidence[misses] = table.share[prefixes]
+            match[misses] = np.where(table.ambiguous[prefixes], MATCH_PREFIX_AMBIGUOUS, MATCH_PREFIX)
+
+        return pd.DataFrame({
+            "Input": raw.astype(str).to_numpy(),
+            ZIP_COLUMN: normalized.fillna("").to_numpy(),
+            GEOGRAPHY_COLUMN: geography,
+            RATE_COLUMN: rate,
+            "Match": match,
+            "Confidence": confidence,
+        })
+
+
+def load_period_index(period, manifest=None):
+    """RateIndex for one period, or None when none of its files exist."""
+    if period.index_dir is not None:
+        return RateIndex.load(period.index_dir)
+
+    # Snapshot store first; a CSV that changed since is compiled instead
+    manifest = manifest or read_manifest()
+    snapshot_index = load_snapshot_index(period.filename, manifest=manifest) if manifest else None
+
+    if snapshot_index is not None:
+        return snapshot_index
+    if not os.path.exists(period.filename):
+        return None
+    return load_rate_index(period.filename)
+
+
+def load_rate_store(periods=None):
+    """Compile/load every available period and merge them into one store.
+
+    periods defaults to rate_periods(), i.e. the CSV periods plus published
+    artifacts. Returns (store, missing_filenames); store is None if no
+    file exists.
+    """
+    if periods is None:
+        periods = rate_periods()
+
+    period_indexes = []
+    missing = []
+    manifest = read_manifest()
+
+    for period in periods:
+        index = load_period_index(period, manifest)
+        if index is None:
+            missing.append(period.filename)
+        else:
+            period_indexes.append((period, index))
+
+    if not period_indexes:
+        return None, missing
+
+    return RateStore.from_indexes(period_indexes), missing
+
+
+class RateStoreLoader:
+    """Load the rate store in a background thread.
+
+    The lookup app keeps one per process in st.cache_resource, so the page
+    renders at once after a restart and every session shares the store.
+    Each period's active runs and ZIP3 prefix table are built up front as
+    well, so the first lookup for any period costs no more than later ones.
+    """
+
+    def __init__(self, periods=None):
+        self.periods = periods if periods is not None else rate_periods()
+        self.store = None
+        self.missing = []
+        self.error = None
+        self.seconds = None
+
+        self._ready = threading.Event()
+        self._thread = threading.Thread(target=self._load, name="rate-store-loader", daemon=True)
+        self._thread.start()
+
+    def _load(self):
+        start = time.perf_counter()
+        try:
+            self.store, self.missing = load_rate_store(self.periods)
+            if self.store is not None:
+                for period in self.periods:
+                    self.store._active_runs(_ordinal(period.start))
+                    self.store._prefix_table(_ordinal(period.start))
+        except Exception as e:
+            self.error = e
+        finally:
+            self.seconds = time.perf_counter() - start
+            self._ready.set()
+
+    @property
+    def ready(self):
+        return self._ready.is_set()
+
+    def wait(self, timeout=None):
+        """Block until loading has finished; returns False on timeout."""
+        return self._ready.wait(timeout)
+
+
+def read_period_file(filename):
+    """Bytes of a period's rate CSV, rebuilt from the snapshot store if the
+    file itself is not deployed. None when neither has it."""
+    if os.path.exists(filename):
+        with open(filename, "rb") as f:
+            return f.read()
+
+    manifest = read_manifest()
+    if manifest and os.path.basename(filename) in manifest["periods"]:
+        return period_csv_bytes(filename, manifest=manifest)
+    return None
+
+
+_default_store = None
+_default_store_error = None
+
+
+def _load_default_store():
+    # Loaded once per process; a failed load is remembered too, rather
+    # than retried on every call
+    global _default_store, _default_store_error
+
+    if _default_store is None and _default_store_error is None:
+        store, missing = load_rate_store()
+        if store is None:
+            _default_store_error = FileNotFoundError(
+                f"No respite rate files found in {os.path.abspath(os.curdir)} "
+                f"or {os.path.abspath(SNAPSHOT_DIR)}; missing: {', '.join(missing)}"
+            )
+        _default_store = store
+
+    if _default_store_error is not None:
+        raise _default_store_error
+    return _default_store
+
+
+def lookup_many(zip_codes, period=None, store=None, fallback=True):
+    """Look up many ZIPs for a period outside Streamlit.
+
+    period may be a RatePeriod, a period label, a date or an ISO date
+    string; None means today. The default store is loaded once per process;
+    FileNotFoundError when no rate file could be loaded.
+    Missing ZIPs get ZIP3 estimates unless fallback=False.
+    """
+    if store is None:
+        store = _load_default_store()
+
+    labelled = get_period(period, rate_periods()) if isinstance(period, str) else None
+
+    if period is None:
+        on_date = date.today()
+    elif isinstance(period, RatePeriod):
+        on_date = period.start
+    elif labelled is not None:
+        on_date = labelled.start
+    else:
+        on_date = period
+
+    return store.lookup_many(zip_codes, on_date, fallback=fallback)
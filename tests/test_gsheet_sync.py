@@ -0,0 +1,175 @@
+import pandas as pd
+from gspread.exceptions import APIError
+
+from gsheet_sync import LocalSpreadsheet, LocalWorksheet, SheetMirror, publish_frame, publish_to_sheet
+
+HEADER = ["Name", "Email", "City", "Score"]
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_mirror():
+    worksheet = LocalWorksheet([
+        HEADER,
+        ["Ann", "ann@example.com", "Boston", 1],
+        ["Bo", "bo@example.com", "Austin", 2],
+        ["Cy", "cy@example.com", "Denver", 3],
+    ])
+    clock = Clock()
+    mirror = SheetMirror(worksheet, "Email", clock=clock)
+    mirror.records()
+    return worksheet, mirror, clock
+
+
+def test_fresh_update_skips_the_key_check():
+    worksheet, mirror, _ = make_mirror()
+
+    mirror.upsert({"Name": "Bo", "Email": "bo@example.com", "City": "Austin", "Score": 5})
+
+    assert mirror.flush() == (1, 0)
+    assert worksheet.values[2] == ["Bo", "bo@example.com", "Austin", 5]
+    assert worksheet.calls["col_values"] == 0
+
+
+def test_update_after_rows_moved_does_not_overwrite_another_row():
+    worksheet, mirror, clock = make_mirror()
+
+    # Within the ttl, someone deletes Ann's row and sorts the rest
+    clock.now = 30
+    del worksheet.values[1]
+    worksheet.values[1:] = sorted(worksheet.values[1:], key=lambda row: row[0], reverse=True)
+
+    mirror.upsert({"Name": "Cy", "Email": "cy@example.com", "City": "Denver", "Score": 9})
+
+    assert mirror.flush() == (1, 0)
+    assert worksheet.values == [
+        HEADER,
+        ["Cy", "cy@example.com", "Denver", 9],
+        ["Bo", "bo@example.com", "Austin", 2],
+    ]
+    assert worksheet.calls["col_values"] == 1
+
+
+def test_update_of_deleted_row_is_appended():
+    worksheet, mirror, clock = make_mirror()
+
+    mirror.upsert({"Name": "Bo", "Email": "bo@example.com", "City": "Austin", "Score": 7})
+    clock.now = 30
+    del worksheet.values[2]
+
+    assert mirror.flush() == (0, 1)
+    assert worksheet.values == [
+        HEADER,
+        ["Ann", "ann@example.com", "Boston", 1],
+        ["Cy", "cy@example.com", "Denver", 3],
+        ["Bo", "bo@example.com", "Austin", 7],
+    ]
+
+
+def test_duplicate_key_is_found_after_its_first_row_changes():
+    worksheet, mirror, clock = make_mirror()
+    worksheet.values.append(["Bo again", "bo@example.com", "Austin", 4])
+    mirror.refresh(force=True)
+
+    # The first Bo row is given another email; the later duplicate remains
+    worksheet.values[2] = ["Di", "di@example.com", "Miami", 5]
+    mirror.refresh(force=True)
+
+    assert mirror.get("bo@example.com")["Name"] == "Bo again"
+    assert mirror.get("di@example.com")["Name"] == "Di"
+
+    mirror.upsert({"Name": "Bo", "Email": "bo@example.com", "City": "Austin", "Score": 6})
+
+    assert mirror.flush() == (1, 0)
+    assert worksheet.values[4] == ["Bo", "bo@example.com", "Austin", 6]
+    assert len(worksheet.values) == 5
+
+
+# ---------------------------
+# Publishing
+# ---------------------------
+def zip_frame(n):
+    return pd.DataFrame({
+        "ZIP CODE": [f"{i:05d}" for i in range(1, n + 1)],
+        "Geography": ["BOSTON"] * n,
+        "rate": [38.16] * n,
+    })
+
+
+def test_publish_writes_chunks_of_max_cells():
+    worksheet = LocalWorksheet()
+    ranges = []
+    batch_update = worksheet.batch_update
+
+    def record_ranges(data):
+        ranges.extend(item["range"] for item in data)
+        return batch_update(data)
+
+    worksheet.batch_update = record_ranges
+    progress = []
+
+    # 3 columns and 6 cells per request: 2 rows per request
+    requests = publish_frame(worksheet, zip_frame(5), progress=lambda *args: progress.append(args), max_cells=6)
+
+    assert requests == 3
+    assert ranges == ["A1:C2", "A3:C4", "A5:C6"]
+    assert progress == [(1, 5), (3, 5), (5, 5)]
+    assert worksheet.values[1] == ["00001", "BOSTON", 38.16]
+
+
+def test_publish_drops_rows_left_from_a_longer_publish():
+    worksheet = LocalWorksheet()
+    publish_frame(worksheet, zip_frame(10))
+
+    publish_frame(worksheet, zip_frame(3))
+
+    assert worksheet.values == [["ZIP CODE", "Geography", "rate"]] + [
+        [f"{i:05d}", "BOSTON", 38.16] for i in range(1, 4)
+    ]
+    assert worksheet.row_count == 4
+
+
+def test_publish_retries_quota_errors():
+    worksheet = LocalWorksheet(quota_errors=2)
+    retried, slept = [], []
+
+    publish_frame(
+        worksheet, zip_frame(3),
+        on_retry=lambda error, delay: retried.append((error.code, delay)),
+        sleep=slept.append,
+    )
+
+    assert [code for code, _ in retried] == [429, 429]
+    assert slept == [delay for _, delay in retried]
+    assert worksheet.calls["resize"] == 3
+    assert len(worksheet.values) == 4
+
+
+def test_publish_to_new_tab_retries_with_callers_settings():
+    spreadsheet = LocalSpreadsheet()
+    add_worksheet = spreadsheet.add_worksheet
+    failing = LocalWorksheet(quota_errors=1)
+
+    def add_worksheet_once_over_quota(*args, **kwargs):
+        if failing.quota_errors:
+            failing.resize()
+        return add_worksheet(*args, **kwargs)
+
+    spreadsheet.add_worksheet = add_worksheet_once_over_quota
+    retried, slept = [], []
+
+    worksheet, requests = publish_to_sheet(
+        spreadsheet, "Rates", zip_frame(3),
+        on_retry=lambda error, delay: retried.append(error), sleep=slept.append,
+    )
+
+    assert len(retried) == 1 and isinstance(retried[0], APIError)
+    assert len(slept) == 1
+    assert spreadsheet.worksheet("Rates") is worksheet
+    assert requests == 1
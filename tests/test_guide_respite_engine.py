@@ -0,0 +1,148 @@
+"""Regression tests for the GUIDE report conversions.
+
+normalize_locality and format_rates replaced per-row lambdas whose output
+goes straight into the published rate CSV; they are checked here against
+those lambdas, and the whole report against a golden file produced by the
+pipeline before the change.
+
+tests/data holds excerpts in the CMS source layouts: ZIPs, geographies
+and GAFs are taken from the real rate tables, plus rows for the edge
+cases (padded state, MAC + Locality fallback, unknown and missing
+localities, a locality with no GAF).
+"""
+import os
+from datetime import date
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from guide_respite_engine import (
+    RATE_COLUMN,
+    build_report,
+    format_rates,
+    normalize_locality,
+    read_addendum_d,
+    read_zip_carrier,
+    report_csv_bytes,
+)
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "data")
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+ZIP_CARRIER_FILE = os.path.join(DATA_DIR, "zip_carrier.csv")
+ADDENDUM_D_FILE = os.path.join(DATA_DIR, "addendum_d.csv")
+GOLDEN_REPORT_FILE = os.path.join(DATA_DIR, "look_up_respite_rate.csv")
+
+GAF_COLUMN = "2026 GAF"
+BASE_RATE = 32.17
+START_DATE = date(2026, 7, 1)
+RUN_ID = 20260101000000
+
+
+# The lambdas the report used before normalize_locality / format_rates
+def old_normalize_locality(values):
+    return values.apply(lambda x: str(int(float(x))) if pd.notna(x) else None)
+
+
+def old_format_rates(rates):
+    return rates.map(lambda x: f"{x:.2f}" if pd.notna(x) else "NA")
+
+
+def as_list(values):
+    # None and NaN both mean "missing" to the merge and the report
+    return [None if pd.isna(x) else x for x in values.astype(object)]
+
+
+def real_rates():
+    table = pd.read_csv(
+        os.path.join(REPO_DIR, "respite_rate_geography_2026_jan.csv"),
+        dtype=str,
+        keep_default_na=False
+    )
+    return pd.to_numeric(table[RATE_COLUMN], errors="coerce")
+
+
+# ---------------------------
+# normalize_locality
+# ---------------------------
+def test_normalize_locality_matches_lambda_on_source_files():
+    df1 = read_zip_carrier(ZIP_CARRIER_FILE)
+    df2 = read_addendum_d(ADDENDUM_D_FILE)
+
+    # A blank LOCALITY makes the column float: 1.0, 51.0, NaN
+    assert df1["LOCALITY"].isna().any()
+
+    for values in [df1["LOCALITY"], df2["Locality Number"]]:
+        assert as_list(normalize_locality(values)) == as_list(old_normalize_locality(values))
+
+
+@pytest.mark.parametrize("values", [
+    [1, 2, 99, 1, 2],
+    [1.0, np.nan, 51.0, 1.0, np.nan],
+    ["01", "1", "1.0", " 99", None, "01"],
+    [np.nan, None],
+    [],
+])
+def test_normalize_locality_matches_lambda(values):
+    values = pd.Series(values, dtype=object, index=range(10, 10 + len(values)))
+
+    result = normalize_locality(values)
+
+    assert as_list(result) == as_list(old_normalize_locality(values))
+    assert result.index.equals(values.index)
+
+
+def test_normalize_locality_raises_like_lambda():
+    values = pd.Series(["01", "not a number"], dtype=object)
+
+    with pytest.raises(ValueError):
+        old_normalize_locality(values)
+    with pytest.raises(ValueError):
+        normalize_locality(values)
+
+
+# ---------------------------
+# format_rates
+# ---------------------------
+def test_format_rates_matches_lambda_on_real_rates():
+    rates = real_rates()
+
+    assert as_list(format_rates(rates)) == as_list(old_format_rates(rates))
+
+
+def test_format_rates_matches_lambda_on_computed_rates():
+    # The report's rates are GAF x base rate rounded to cents, NaN where
+    # there is no GAF; half-cent and float-noise cases included
+    gaf = pd.Series([1.323, np.nan, 1.186, 1.0155, 0.9999, np.nan, 1.323, 0.0])
+    rates = (gaf * BASE_RATE).round(2)
+    rates = pd.concat([rates, pd.Series([0.005, 0.015, 2.675, 1e6, -1.5])], ignore_index=True)
+
+    result = format_rates(rates)
+
+    assert as_list(result) == as_list(old_format_rates(rates))
+    assert (result[rates.isna()] == "NA").all()
+
+
+def test_format_rates_keeps_index():
+    rates = pd.Series([33.88, np.nan, 42.56], index=[5, 3, 9])
+
+    result = format_rates(rates)
+
+    assert list(result) == ["33.88", "NA", "42.56"]
+    assert result.index.equals(rates.index)
+
+
+# ---------------------------
+# Whole report
+# ---------------------------
+def test_report_csv_matches_golden_file():
+    df1 = read_zip_carrier(ZIP_CARRIER_FILE)
+    df2 = read_addendum_d(ADDENDUM_D_FILE)
+
+    final_df, stats = build_report(df1, df2, GAF_COLUMN, BASE_RATE, START_DATE, RUN_ID)
+
+    with open(GOLDEN_REPORT_FILE, "rb") as f:
+        assert report_csv_bytes(final_df) == f.read()
+
+    assert stats == {"primary_matches": 33, "fallback_matches": 1, "unmatched": 6, "total": 40}
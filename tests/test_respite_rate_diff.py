@@ -0,0 +1,68 @@
+import numpy as np
+import pandas as pd
+
+from respite_rate_diff import changes_csv_bytes, diff_tables
+from respite_rate_index import GEOGRAPHY_COLUMN, RATE_COLUMN, ZIP_COLUMN
+
+
+def rate_frame(rows):
+    return pd.DataFrame(rows, columns=[ZIP_COLUMN, GEOGRAPHY_COLUMN, RATE_COLUMN])
+
+
+OLD = rate_frame([
+    ["01001", "AGAWAM", 30.00],
+    ["01002", "AMHERST", 30.00],
+    ["02134", "BOSTON", 38.16],
+    ["02135", "BOSTON", 38.16],
+    ["02136", "BOSTON", 38.16],
+    ["09999", "NAPA", 40.00],
+])
+NEW = rate_frame([
+    ["00501", "NAPA", 40.00],
+    ["01001", "AGAWAM", 30.00],
+    ["01002", "AGAWAM", 30.00],
+    ["02134", "BOSTON", 38.50],
+    ["02135", "BOSTON", 38.16],
+    ["02136", "BOSTON", 38.16],
+])
+
+
+def test_diff_finds_added_removed_and_changed_zips():
+    diff = diff_tables(OLD, NEW)
+
+    changes = diff.changes
+    assert changes[ZIP_COLUMN].tolist() == ["00501", "01002", "02134", "09999"]
+    assert changes["Change"].tolist() == ["added", "geography", "rate", "removed"]
+    assert changes["Old Geography"].fillna("").tolist() == ["", "AMHERST", "BOSTON", "NAPA"]
+    assert changes["New Geography"].fillna("").tolist() == ["NAPA", "AGAWAM", "BOSTON", ""]
+    assert np.array_equal(changes["Rate Change"], [np.nan, 0.0, 0.34, np.nan], equal_nan=True)
+
+    assert diff.counts == {
+        "old_zips": 6, "new_zips": 6, "unchanged": 3,
+        "added": 1, "removed": 1, "geography": 1, "rate": 1, "geography + rate": 0,
+    }
+
+
+def test_diff_summary_counts_changes_by_geography():
+    summary = diff_tables(OLD, NEW).summary.set_index(GEOGRAPHY_COLUMN)
+
+    assert summary["ZIPs Before"].to_dict() == {"AGAWAM": 1, "AMHERST": 1, "BOSTON": 3, "NAPA": 1}
+    assert summary["ZIPs After"].to_dict() == {"AGAWAM": 2, "AMHERST": 0, "BOSTON": 3, "NAPA": 1}
+
+    # A moved ZIP counts under its new geography, a removed one under its old
+    assert summary.loc["AGAWAM", "geography"] == 1
+    assert summary.loc["BOSTON", "rate"] == 1
+    assert summary.loc["NAPA", ["added", "removed"]].tolist() == [1, 1]
+
+    # The geography's rate is its most common one; none once it has no ZIPs
+    assert summary.loc["BOSTON", ["Old Rate", "New Rate"]].tolist() == [38.16, 38.16]
+    assert np.isnan(summary.loc["AMHERST", "New Rate"])
+
+
+def test_changes_csv_keeps_leading_zeros():
+    lines = changes_csv_bytes(diff_tables(OLD, NEW).changes).decode("utf-8").splitlines()
+
+    assert lines[0] == "ZIP CODE,Change,Old Geography,New Geography,Old Rate,New Rate,Rate Change"
+    assert lines[1] == '"=""00501""",added,,NAPA,,40.0,'
+    assert lines[2] == '"=""01002""",geography,AMHERST,AGAWAM,30.0,30.0,0.0'
+    assert lines[4] == '"=""09999""",removed,NAPA,,40.0,,'
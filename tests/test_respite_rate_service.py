@@ -0,0 +1,96 @@
+import asyncio
+import json
+import os
+
+import pytest
+
+from respite_rate_service import HTTPError, RateService, _read_request
+from respite_rate_store import RateStoreLoader
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture(scope="module")
+def service():
+    cwd = os.getcwd()
+    os.chdir(REPO_DIR)
+    try:
+        loader = RateStoreLoader()
+        loader.wait()
+    finally:
+        os.chdir(cwd)
+    return RateService(loader)
+
+
+def post_rates(service, payload):
+    body = payload if isinstance(payload, bytes) else json.dumps(payload).encode("utf-8")
+    _, status, response = asyncio.run(service.dispatch("POST", "/rates", body))
+    return status, json.loads(response)
+
+
+def read_request(data):
+    async def read():
+        reader = asyncio.StreamReader()
+        reader.feed_data(data)
+        reader.feed_eof()
+        return await _read_request(reader)
+
+    return asyncio.run(read())
+
+
+def test_rates_echo_inputs_as_sent(service):
+    zips = [None, "02134", 2134, '="02134"', "abc"]
+
+    status, response = post_rates(service, {"zips": zips, "date": "2026-07-01"})
+
+    assert status == 200
+    assert [result["input"] for result in response["results"]] == zips
+    assert [result["match"] for result in response["results"]] == [
+        "invalid", "exact", "exact", "exact", "invalid",
+    ]
+
+
+def test_rates_reject_nan_in_body(service):
+    status, _ = post_rates(service, b'{"zips": [NaN]}')
+
+    assert status == 400
+
+
+@pytest.mark.parametrize("fallback", ["false", "0", 0, {}, None])
+def test_rates_reject_non_boolean_fallback(service, fallback):
+    status, response = post_rates(service, {"zips": ["02134"], "fallback": fallback})
+
+    assert status == 400
+    assert "fallback" in response["error"]
+
+
+def test_rates_fallback_false_skips_estimates(service):
+    # 02198 is not in the rate file; its ZIP3 prefix 021 is
+    status, estimated = post_rates(service, {"zips": ["02198"], "date": "2026-07-01"})
+    status, skipped = post_rates(service, {"zips": ["02198"], "date": "2026-07-01", "fallback": False})
+
+    assert estimated["results"][0]["match"].startswith("zip3 estimate")
+    assert skipped["results"][0]["match"] == "not found"
+
+
+@pytest.mark.parametrize("content_length, status", [
+    ("abc", 400),
+    ("-5", 400),
+    ("1_0", 400),
+    ("99999999999", 413),
+])
+def test_bad_content_length_is_an_http_error(content_length, status):
+    data = f"POST /rates HTTP/1.1\r\nContent-Length: {content_length}\r\n\r\n".encode("latin-1")
+
+    with pytest.raises(HTTPError) as error:
+        read_request(data)
+
+    assert error.value.status == status
+
+
+def test_content_length_reads_body():
+    method, target, version, headers, body = read_request(
+        b"POST /rates HTTP/1.1\r\nContent-Length: 4\r\n\r\nnull"
+    )
+
+    assert (method, target, body) == ("POST", "/rates", b"null")
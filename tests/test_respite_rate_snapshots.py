@@ -0,0 +1,66 @@
+import os
+
+import numpy as np
+
+from respite_rate_index import load_rate_index
+from respite_rate_snapshots import build_snapshots, load_snapshot_index, period_csv_bytes
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RATE_CSV = os.path.join(REPO_DIR, "respite_rate_geography_2026_jan.csv")
+
+
+def write_period(directory, name, header, rows):
+    path = os.path.join(directory, name)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(header + "".join(rows))
+    return path
+
+
+def test_periods_rebuild_exactly_after_inserts_removals_and_reorders(tmp_path):
+    with open(RATE_CSV, encoding="utf-8") as f:
+        header, *rows = f.readlines()
+
+    # ZIPs added in the middle, at the start and at the end
+    inserted = list(rows)
+    inserted.insert(20000, '"=""00001""",NAPA,39.08\n')
+    inserted.insert(0, '"=""00002""",ALASKA,42.56\n')
+    inserted.append('"=""99999""",ALASKA,12.34\n')
+
+    # Plus removed ZIPs, a changed geography and an NA rate
+    edited = [row for i, row in enumerate(inserted) if i % 1000 != 5]
+    edited[100] = edited[100].replace("ALASKA", "NAPA")
+    edited.insert(300, '"=""00003""",NA,NA\n')
+
+    # Base ZIPs in another order: stored as a snapshot of its own
+    reordered = list(edited)
+    reordered[10], reordered[20000] = reordered[20000], reordered[10]
+
+    paths = [
+        write_period(tmp_path, f"period_{i}.csv", header, period_rows)
+        for i, period_rows in enumerate([rows, inserted, edited, reordered])
+    ]
+    snapshot_dir = os.path.join(tmp_path, "snapshots")
+
+    manifest = build_snapshots(paths, snapshot_dir)
+
+    entries = [manifest["periods"][os.path.basename(path)] for path in paths]
+    assert entries[1]["base"] == entries[0]["base"]
+    assert len(entries[1]["added"]) == 3
+    assert entries[2]["base"] == entries[0]["base"]
+    assert entries[3]["base"] != entries[0]["base"]
+
+    for path in paths:
+        with open(path, "rb") as f:
+            assert period_csv_bytes(os.path.basename(path), snapshot_dir, manifest) == f.read()
+
+        stored = load_snapshot_index(path, snapshot_dir, manifest)
+        compiled = load_rate_index(path, os.path.join(tmp_path, "index"))
+
+        assert np.array_equal(stored.zips, compiled.zips)
+        assert (
+            np.asarray(stored.geographies, dtype=object)[stored.geography_codes].tolist()
+            == np.asarray(compiled.geographies, dtype=object)[compiled.geography_codes].tolist()
+        )
+        assert np.array_equal(
+            stored.rates[stored.rate_codes], compiled.rates[compiled.rate_codes], equal_nan=True
+        )
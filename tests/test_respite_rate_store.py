@@ -0,0 +1,123 @@
+from datetime import date
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import respite_rate_store
+from respite_rate_index import GEOGRAPHY_COLUMN, RATE_COLUMN, ZIP_COLUMN, RateIndex
+from respite_rate_store import (
+    MATCH_EXACT,
+    MATCH_NOT_FOUND,
+    MATCH_PREFIX,
+    MATCH_PREFIX_AMBIGUOUS,
+    PrefixEstimate,
+    RatePeriod,
+    RateStore,
+    lookup_many,
+)
+
+
+def rate_index(rows):
+    return RateIndex.from_frame(pd.DataFrame(rows, columns=[ZIP_COLUMN, GEOGRAPHY_COLUMN, RATE_COLUMN]))
+
+
+JAN = RatePeriod("Jan", "jan.csv", date(2026, 1, 1), date(2026, 1, 31))
+FEB = RatePeriod("Feb", "feb.csv", date(2026, 2, 1), date(2026, 2, 28))
+MAR = RatePeriod("Mar", "mar.csv", date(2026, 3, 1), None)
+
+
+# ---------------------------
+# Periods and runs
+# ---------------------------
+def test_unchanged_zip_in_adjacent_periods_is_one_run():
+    store = RateStore.from_indexes([
+        (JAN, rate_index([["02134", "BOSTON", 38.16]])),
+        (FEB, rate_index([["02134", "BOSTON", 38.16]])),
+    ])
+
+    assert len(store) == 1
+    assert store.rate_on("02134", date(2026, 2, 15)) == ("BOSTON", 38.16)
+
+
+def test_missing_period_leaves_a_gap():
+    # February's file is missing: its dates have no rate, even though
+    # January and March agree on either side
+    store = RateStore.from_indexes([
+        (JAN, rate_index([["02134", "BOSTON", 38.16]])),
+        (MAR, rate_index([["02134", "BOSTON", 38.16]])),
+    ])
+
+    assert store.rate_on("02134", date(2026, 1, 31)) == ("BOSTON", 38.16)
+    assert store.rate_on("02134", date(2026, 2, 15)) is None
+    assert store.rate_on("02134", date(2026, 3, 1)) == ("BOSTON", 38.16)
+    assert [run["end"] for run in store.history("02134")] == [date(2026, 1, 31), None]
+
+
+# ---------------------------
+# ZIP3 prefix fallback
+# ---------------------------
+@pytest.fixture
+def prefix_store():
+    return RateStore.from_indexes([(JAN, rate_index([
+        # 010: three AGAWAM ZIPs (two at 30.00) and one AMHERST
+        ["01001", "AGAWAM", 30.00],
+        ["01002", "AGAWAM", 30.00],
+        ["01003", "AMHERST", 31.00],
+        ["01004", "AGAWAM", 29.00],
+        # 021: every ZIP in BOSTON at one rate
+        ["02134", "BOSTON", 38.16],
+        ["02135", "BOSTON", 38.16],
+    ]))])
+
+
+def test_estimate_for_single_rate_prefix(prefix_store):
+    assert prefix_store.estimate_on("02199", JAN.start) == PrefixEstimate(
+        "021", "BOSTON", 38.16, 1.0, False, 2
+    )
+
+
+def test_estimate_for_mixed_prefix_takes_most_common(prefix_store):
+    # AGAWAM covers 3 of the 4 ZIPs, and 30.00 is its most common rate
+    assert prefix_store.estimate_on("01099", JAN.start) == PrefixEstimate(
+        "010", "AGAWAM", 30.00, 0.75, True, 4
+    )
+
+
+def test_estimate_for_empty_prefix_is_none(prefix_store):
+    assert prefix_store.estimate_on("99950", JAN.start) is None
+    assert prefix_store.estimate_on("02199", date(2025, 12, 31)) is None
+
+
+def test_lookup_many_falls_back_only_for_misses(prefix_store):
+    result = prefix_store.lookup_many(["02134", "02199", "01099", "99950"], JAN.start)
+
+    assert result["Match"].tolist() == [MATCH_EXACT, MATCH_PREFIX, MATCH_PREFIX_AMBIGUOUS, MATCH_NOT_FOUND]
+    assert result[GEOGRAPHY_COLUMN].tolist() == ["BOSTON", "BOSTON", "AGAWAM", "NA"]
+    assert np.array_equal(result[RATE_COLUMN], [38.16, 38.16, 30.00, np.nan], equal_nan=True)
+    assert np.array_equal(result["Confidence"], [1.0, 1.0, 0.75, np.nan], equal_nan=True)
+
+
+def test_lookup_many_without_fallback(prefix_store):
+    result = prefix_store.lookup_many(["02134", "02199", "01099"], JAN.start, fallback=False)
+
+    assert result["Match"].tolist() == [MATCH_EXACT, MATCH_NOT_FOUND, MATCH_NOT_FOUND]
+    assert result[GEOGRAPHY_COLUMN].tolist() == ["BOSTON", "NA", "NA"]
+    assert result[RATE_COLUMN].isna().tolist() == [False, True, True]
+
+
+# ---------------------------
+# Module-level lookup_many
+# ---------------------------
+def test_lookup_many_without_rate_files_raises_once_loaded(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(respite_rate_store, "_default_store", None)
+    monkeypatch.setattr(respite_rate_store, "_default_store_error", None)
+
+    with pytest.raises(FileNotFoundError, match=str(tmp_path)):
+        lookup_many(["02134"])
+
+    # The failure is remembered instead of reloading on every call
+    monkeypatch.setattr(respite_rate_store, "load_rate_store", None)
+    with pytest.raises(FileNotFoundError):
+        lookup_many(["02134"])